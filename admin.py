@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
 
 from .models import *
+from .module_settings import TRANSMITTER_LOG_INLINE_LIMIT
 
 
 @admin.register(FieldHandler)
@@ -54,6 +56,8 @@ class DataConnectorAdmin(admin.ModelAdmin):
                 'slug',
                 'description',
                 'content_type',
+                'read_database',
+                'upsert_key',
                 'additional_buttons',
             )
         }),
@@ -63,7 +67,8 @@ class DataConnectorAdmin(admin.ModelAdmin):
                 ('is_allow_view',
                 'is_allow_edit',
                 'is_allow_delete',
-                'is_allow_create')
+                'is_allow_create'),
+                'is_allow_self_assembly',
             )
         }),
         ('Дополнительное', {
@@ -98,6 +103,20 @@ class DataConnectorAdmin(admin.ModelAdmin):
     inlines = [
         SerializerFieldInline,
     ]
+    actions = [
+        'sync_serializer_fields',
+    ]
+
+    @admin.action(description='Добавить недостающие поля модели')
+    def sync_serializer_fields(self, request, queryset):
+        # Поля без пары в модели не удаляются: вместе с ними пропали бы настройки обработчиков.
+        # Удаление - командой sync_serializer_fields
+        created_count = 0
+        for data_connector in queryset.select_related('content_type'):
+            created, _ = data_connector.sync_serializer_fields(remove=False)
+            created_count += created
+
+        self.message_user(request, f'Добавлено полей: {created_count}')
 
 
 @admin.register(RemoteSite)
@@ -114,17 +133,52 @@ class TransmitterLogAdmin(admin.ModelAdmin):
     search_fields = [
         'id',
     ]
+    list_display = [
+        'id',
+        'transmitter',
+        'status',
+        'date',
+    ]
+    list_filter = [
+        'status',
+    ]
+    list_select_related = [
+        'transmitter',
+    ]
+
+
+class RecentTransmitterLogFormSet(BaseInlineFormSet):
+    """
+        Показывает только последние логи передатчика, а не все накопленные.
+    """
+
+    def get_queryset(self):
+        if not hasattr(self, '_recent_queryset'):
+            queryset = super().get_queryset()
+            recent_ids = list(queryset.values_list('id', flat=True)[:TRANSMITTER_LOG_INLINE_LIMIT])
+            self._recent_queryset = queryset.filter(id__in=recent_ids)
+        return self._recent_queryset
 
 
 class TransmitterLogInline(
     admin.StackedInline, 
 ):
     model = TransmitterLog
+    formset = RecentTransmitterLogFormSet
     verbose_name = TransmitterLog._meta.verbose_name
-    verbose_name_plural = TransmitterLog._meta.verbose_name_plural
+    verbose_name_plural = f'{TransmitterLog._meta.verbose_name_plural} (последние {TRANSMITTER_LOG_INLINE_LIMIT})'
     show_change_link = True
     # view_on_site = False   
     extra = 0
+    can_delete = False
+    readonly_fields = [
+        'status',
+        'date',
+        'result',
+    ]
+
+    def has_add_permission(self, request, obj=None):
+        return False
     
     # fields = [
     #     'name',
@@ -141,8 +195,73 @@ class TransmitterAdmin(admin.ModelAdmin):
     # readonly_fields = [
     #     'buttons',
     # ]
+    readonly_fields = [
+        'last_run_at',
+        'is_running',
+        'running_since',
+    ]
     inlines = [
         TransmitterLogInline,
     ]
 
 
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    search_fields = [
+        'object_id',
+    ]
+    list_display = [
+        'id',
+        'content_type',
+        'object_id',
+        'changed',
+        'attempts',
+    ]
+    list_filter = [
+        'content_type',
+    ]
+    list_select_related = [
+        'content_type',
+    ]
+    readonly_fields = [
+        'content_type',
+        'object_id',
+        'changed',
+        'attempts',
+        'last_error',
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    search_fields = [
+        'key',
+    ]
+    list_display = [
+        'id',
+        'key',
+        'user',
+        'status',
+        'created',
+        'expires',
+    ]
+    list_select_related = [
+        'user',
+    ]
+    exclude = [
+        'response',
+    ]
+    readonly_fields = [
+        'user',
+        'key',
+        'request_hash',
+        'status',
+        'created',
+        'expires',
+    ]
+
+    def has_add_permission(self, request):
+        return False
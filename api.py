@@ -1,114 +1,142 @@
-import json
+from itertools import islice
+from typing import Optional
 
-from urllib.parse import unquote
+from asgiref.sync import sync_to_async
 
 from django.views import View
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
 from django.http.request import QueryDict
-from django.core.exceptions import FieldError
 from django.views.decorators.csrf import csrf_exempt
-from django.contrib.contenttypes.models import ContentType
 
 from rest_framework.views import APIView
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import APIException
 from rest_framework import status, permissions
+from rest_framework.settings import api_settings
 
 from .models import (
     DataConnector,
+    IdempotencyKey,
 )
-
-
-class SuperApiView(APIView):
+from .mixins import SuperApiMixin, IdempotencyConflict
+from .module_settings import BATCH_MAX_OPERATIONS, SERIALIZE_CHUNK_SIZE, IDEMPOTENCY_REPLAYED_HEADER
+from .renderers import FastJSONRenderer, ColumnarJSONRenderer
+from .parsers import FastJSONParser
+from .encoders import dumps, loads
+from .filters import FilterError
+from .serialization import IncludeError, materialize
+from .definitions import DefinitionError, DefinitionForbidden, apply_definitions, dump_definitions, get_fingerprint
+from .outbox import suppress_outbox
+
+
+class BatchRollback(Exception):
+    """
+        Прерывает atomic пакетный запрос, чтобы откатить уже выполненные операции.
+    """
+
+
+class SuperApiView(
+    SuperApiMixin,
+    APIView,
+):
     permission_classes = [
         # permissions.AllowAny, 
         permissions.IsAuthenticated, 
     ]
+    # Стандартные JSON рендерер и парсер заменяются быстрыми (orjson, если установлен)
+    renderer_classes = [
+        FastJSONRenderer if renderer_class is JSONRenderer else renderer_class
+        for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES
+    ] + [
+        ColumnarJSONRenderer,
+    ]
+    parser_classes = [
+        FastJSONParser if parser_class is JSONParser else parser_class
+        for parser_class in api_settings.DEFAULT_PARSER_CLASSES
+    ]
 
-    def get_some_model(self, natural_key, obj_id=None):
-        try:
-            content_type = ContentType.objects.get_by_natural_key(*natural_key.split('__'))
-            some_model = content_type.model_class()
-            print('type some_model', type(some_model))
-            print('get_some_model some_model', some_model)
-            print('get_some_model some_model.__class__.__name__', some_model.__name__)
-        except:
-            some_model = None
-
-
-        return some_model
-    
-    def get_object(self, some_model, obj_id=None):
-        if not obj_id:
-            return None
-        
-        return some_model.objects.filter(id=obj_id).first()
-    
-    def get_queryset(self, some_model, obj_id=None, get_params={}):
-        print('SuperApiView get_queryset')
-        print('get_params', get_params)
-        if obj_id:
-            return some_model.objects.filter(id=obj_id)
-        elif get_params:
-            return some_model.objects.filter(**self.get_django_filter(get_params))
-        else:
-            return some_model.objects.all()
-        
     def get_request_data(self, request):
         request_data = {}
         if request.data:
             request_data = request.data
         
         elif request.body:
-            request_data = json.loads(request.body)
+            request_data = loads(request.body)
 
         return request_data
 
-    def get_django_filter(self, get_params: QueryDict) -> dict:
-        '''
-            Возвращает queryset по переданым get_params
-        '''
-        django_filter = {}
+    def get(self, request, natural_key, serializer_name=None, obj_id=None):
+        print('SuperApiView get')
+        # print('args', args)
+        print('GET', dict(request.GET))
 
-        for get_param_slug, get_param_value in get_params.items():
+        is_columnar = request.accepted_renderer.format == ColumnarJSONRenderer.format
+        # Обычный JSON ответ без include отдается потоком, остальные форматы рендерятся целиком
+        is_stream = isinstance(request.accepted_renderer, JSONRenderer) and not is_columnar \
+            and not request.GET.get('include')
+        response_data, response_status = self.get_result(
+            request.GET,
+            natural_key,
+            serializer_name,
+            obj_id,
+            is_columnar=is_columnar,
+            is_stream=is_stream,
+        )
+        if is_stream and response_status == status.HTTP_200_OK:
+            return self.get_stream_response(response_data, response_status)
 
-            print('get_param_value', get_param_value)
+        return Response(response_data, status=response_status)
 
-            # Пробразуем спецефичные для QueryDict значения в валидные значения для objects.filter()
-            if get_param_value in ['True', 'true', 'False', 'false']:
-                if get_param_value in ['True', 'true']:
-                    get_param_value = True
-                else:
-                    get_param_value = False
-            else:
-                print('get_param_value', get_param_value)
-                if ',' in get_param_value:
-                    get_params_value = get_param_value.split(',')
-                    get_param_value = []
-                    for get_params_value_item in get_params_value:
-                        try:
-                            get_param_value.append(int(get_params_value_item))
-                        except ValueError:
-                            get_param_value.append(unquote(get_params_value_item))
+    def get_stream_response(self, response_data: dict, response_status: int):
+        '''
+            Первая пачка объектов сериализуется до отправки заголовков: ошибка в ней (например в фильтре
+            или обработчике поля) возвращается обычным ответом с ошибкой, а не оборванным JSON со статусом 200.
+        '''
+        items = iter(response_data['data'])
+        try:
+            first_chunk = self.encode_chunk(items)
+        except Exception as error:
+            return Response(
+                {"status": "error", "message": f"Ошибка сериализации: {error}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
 
-            if type(get_param_value) != list:
-                try:
-                    get_param_value = int(get_param_value)
-                except ValueError:
-                    pass
+        return StreamingHttpResponse(
+            self.iter_json(response_data, first_chunk, items),
+            status=response_status,
+            content_type='application/json',
+        )
 
-            try:
-                django_filter[get_param_slug] = get_param_value
-            except AttributeError:
-                pass
-            except FieldError:
-                pass
-        print('django_filter', django_filter)
-        return django_filter
-        
-    def get(self, request, natural_key, serializer_name=None, obj_id=None):
-        print('SuperApiView get')
-        # print('args', args)
-        print('GET', dict(request.GET))
+    def encode_chunk(self, items) -> bytes:
+        '''
+            Кодирует следующие SERIALIZE_CHUNK_SIZE объектов через запятую. Пустая строка - объекты закончились.
+        '''
+        return b','.join(dumps(fields_data) for fields_data in islice(items, SERIALIZE_CHUNK_SIZE))
 
+    def iter_json(self, response_data: dict, first_chunk: bytes, items):
+        '''
+            Кодирует ответ по частям: после первой пачки объекты из генератора response_data["data"] пишутся пачками.
+        '''
+        envelope = {key: value for key, value in response_data.items() if key != 'data'}
+        yield dumps(envelope)[:-1] + (b',' if envelope else b'') + b'"data":[' + first_chunk
+
+        if first_chunk:
+            while True:
+                chunk = self.encode_chunk(items)
+                if not chunk:
+                    break
+                yield b',' + chunk
+        yield b']}'
+
+    def get_result(self, get_params, natural_key, serializer_name=None, obj_id=None, is_columnar=False, is_stream=False) -> tuple:
+        '''
+            Выполняет GET и возвращает (данные ответа, статус). Используется в get() и в пакетных запросах.
+            При is_stream данные отдаются генератором и сериализуются по мере отправки ответа.
+        '''
         # print('natural_key', natural_key)
         # print('serializer_name', serializer_name)
         # print('obj_id', obj_id)
@@ -116,7 +144,7 @@ class SuperApiView(APIView):
         some_model = self.get_some_model(natural_key)
         print('some_model', some_model)
         if not some_model:
-            return Response({"status": "error", "message": "Нет модели с таким натуральным ключом"}, status=status.HTTP_404_NOT_FOUND)
+            return {"status": "error", "message": "Нет модели с таким натуральным ключом"}, status.HTTP_404_NOT_FOUND
         
         
         if obj_id:
@@ -124,130 +152,605 @@ class SuperApiView(APIView):
             print('obj', obj)
 
             if not obj:
-                return Response({"status": "error", "message": "Нет объекта с таким id"}, status=status.HTTP_404_NOT_FOUND)
-            
-        queryset = self.get_queryset(some_model, obj_id, request.GET)
-
-        if not queryset:
-            return Response({"status": "error", "message": "Нет queryset"}, status=status.HTTP_404_NOT_FOUND)
+                return {"status": "error", "message": "Нет объекта с таким id"}, status.HTTP_404_NOT_FOUND
 
         try:
-            serializer = DataConnector.get_serializer(some_model, serializer_name)
+            serializer = self.get_data_connector(some_model, serializer_name=serializer_name)
         except:
             serializer = None
 
         print('serializer', serializer)
         if not serializer:
-            return Response({"status": "error", "message": "У модели нет сериализатора"}, status=status.HTTP_404_NOT_FOUND)
+            return {"status": "error", "message": "У модели нет сериализатора"}, status.HTTP_404_NOT_FOUND
+
+        try:
+            queryset = self.get_queryset(some_model, obj_id, get_params, serializer)
+        except FilterError as error:
+            return {"status": "error", "message": str(error)}, status.HTTP_400_BAD_REQUEST
+
+        if not queryset.exists():
+            return {"status": "error", "message": "Нет queryset"}, status.HTTP_404_NOT_FOUND
         
-        data = serializer.get_data(queryset)
+        include = [include_key for include_key in get_params.get('include', '').split(',') if include_key]
+        included = None
+        if include:
+            if is_columnar:
+                return {"status": "error", "message": "include не поддерживается для format=columnar"}, status.HTTP_400_BAD_REQUEST
+
+            try:
+                sideloaded_data = serializer.get_sideloaded_data(queryset, include)
+            except IncludeError as error:
+                return {"status": "error", "message": str(error)}, status.HTTP_400_BAD_REQUEST
+
+            data = sideloaded_data['data']
+            included = sideloaded_data['included']
+
+        elif is_columnar:
+            data = serializer.get_columnar_data(queryset)
+        elif is_stream:
+            data = serializer.iter_data(queryset)
+        else:
+            data = serializer.get_data(queryset)
 
         if not data:
-            return Response({"status": "error", "message": "Нет данных"}, status=status.HTTP_404_NOT_FOUND)
+            return {"status": "error", "message": "Нет данных"}, status.HTTP_404_NOT_FOUND
+
+        response_data = {"status": "ok", "message": "", "data": data}
+        if included is not None:
+            response_data['included'] = included
 
-        return Response({"status": "ok", "message": "", "data": data}, status=status.HTTP_200_OK)
+        return response_data, status.HTTP_200_OK
     
+    def get_idempotent_response(self, request, method: str, get_result) -> Response:
+        '''
+            Ответ на запрос с Idempotency-Key: повтор получает сохраненный ответ, get_result() не вызывается.
+        '''
+        try:
+            record, stored_response = self.claim_idempotency_key(request, method)
+        except IdempotencyConflict as error:
+            return Response({"message": str(error)}, status=error.status_code)
+
+        if stored_response:
+            response_data, response_status = stored_response
+            return Response(response_data, status=response_status, headers={IDEMPOTENCY_REPLAYED_HEADER: 'true'})
+
+        response_data, response_status = self.run_idempotent(record, get_result)
+        return Response(response_data, status=response_status)
+
     # @csrf_exempt
     def post(self, request, natural_key, serializer_name=None, obj_id=None):
         print('post')
         # print('request.data', request.data)
 
-        if obj_id:   
-            return Response({"message": "Нельзя задать id для создаваемого обьекта"}, status=status.HTTP_404_NOT_FOUND)
+        def get_result():
+            request_data = self.get_request_data(request)
+            print('request_data', request_data)
+            return self.set_result(request_data, 'POST', natural_key, serializer_name, obj_id)
 
-        request_data = self.get_request_data(request)
-        print('request_data', request_data)
+        return self.get_idempotent_response(request, 'POST', get_result)
+
+    def patch(self, request, natural_key, serializer_name=None, obj_id=None):
+        print('SuperApiView.patch()')
+
+        def get_result():
+            request_data = self.get_request_data(request)
+            print('request_data', request_data)
+            return self.set_result(request_data, 'PATCH', natural_key, serializer_name, obj_id)
+
+        return self.get_idempotent_response(request, 'PATCH', get_result)
+
+    def set_result(self, request_data, method: str, natural_key, serializer_name=None, obj_id=None) -> tuple:
+        '''
+            Выполняет POST/PATCH и возвращает (данные ответа, статус). Используется в post(), patch() и в пакетных запросах.
+        '''
+        if method == 'POST' and obj_id:
+            return {"message": "Нельзя задать id для создаваемого обьекта"}, status.HTTP_404_NOT_FOUND
+
+        bulk_data = None
+        if method == 'PATCH' and not obj_id:
+            # Массовое обновление: [{"id": 1, ...}, ...] или {"data": [{"id": 1, ...}, ...]}
+            bulk_data = request_data.get('data') if isinstance(request_data, dict) else request_data
+            if not isinstance(bulk_data, list):
+                return {"message": "В url не задан id для обновляемого обьекта"}, status.HTTP_404_NOT_FOUND
 
         if not request_data:
-            return Response({"message": "Данные не найдены"}, status=status.HTTP_404_NOT_FOUND)
+            return {"message": "Данные не найдены"}, status.HTTP_404_NOT_FOUND
 
         # data = request_data.get('data')
         # if not data:
-        #     return Response({"message": "Данные не найдены"}, status=status.HTTP_404_NOT_FOUND)
+        #     return Response({"message": "Данные не найдены"}, status=status.HTTP_404_NOT_FOUND)
 
         some_model = self.get_some_model(natural_key)
         if not some_model:
-            return Response({"message": "Нет модели с таким натуральным ключом"}, status=status.HTTP_404_NOT_FOUND)
+            return {"message": "Нет модели с таким натуральным ключом"}, status.HTTP_404_NOT_FOUND
 
         serializer_self_assembly_data = None
         if type(request_data) == dict:
             serializer_self_assembly_data = request_data.get('serializer_self_assembly_data')
 
         try:
-            serializer = DataConnector.get_serializer(
+            serializer = self.get_data_connector(
                 some_model,
-                'POST',
+                method,
                 serializer_name, 
                 serializer_self_assembly_data,
             )
+        except DefinitionForbidden as error:
+            return {"message": f"serializer_self_assembly_data: {error}"}, status.HTTP_403_FORBIDDEN
+        except DefinitionError as error:
+            return {"message": f"Ошибка в serializer_self_assembly_data: {error}"}, status.HTTP_400_BAD_REQUEST
         except:
             serializer = None
 
         if not serializer:
-            return Response({"message": "Сериализатор не найден"}, status=status.HTTP_404_NOT_FOUND)       
+            return {"message": "Сериализатор не найден"}, status.HTTP_404_NOT_FOUND
+
+        if serializer.is_auto:
+            return {"message": "Автоматический сериализатор только для чтения"}, status.HTTP_405_METHOD_NOT_ALLOWED
+
+        if not serializer.is_method_allowed(method):
+            return {"message": f"Сериализатор не разрешает {method}"}, status.HTTP_403_FORBIDDEN
+
+        if bulk_data is not None:
+            with suppress_outbox(self.is_replication_request()):
+                comment, response_status, response_data, error_data = serializer.bulk_update_data(bulk_data)
+            self.mark_write()
+            return (
+                {
+                    "message": comment,
+                    "data": response_data,
+                    "errors": error_data,
+                },
+                response_status,
+            )
 
-        comment, response_status, response_data = serializer.set_data(request_data, method='POST') 
+        with suppress_outbox(self.is_replication_request()):
+            comment, response_status, response_data = serializer.set_data(request_data, method=method, obj_id=obj_id)
+        self.mark_write()
 
-        return Response(
+        return (
             {
                 "message": comment,
                 "data": response_data,
             }, 
-            status=response_status,
+            response_status,
         )
     
+    def put(self, request, natural_key, serializer_name=None, obj_id=None):
+        return Response({"message": "ok"}, status=status.HTTP_200_OK)
+    
+    def delete(self, request, natural_key, serializer_name=None, obj_id=None):
+        def get_result():
+            request_data = self.get_request_data(request)
+            return self.delete_result(request_data, natural_key, serializer_name, obj_id)
 
-    def patch(self, request, natural_key, serializer_name=None, obj_id=None):
-        print('SuperApiView.patch()')
-        print('data', request.data)
+        return self.get_idempotent_response(request, 'DELETE', get_result)
 
-        if not obj_id:   
-            return Response({"message": "В url не задан id для обновляемого обьекта"}, status=status.HTTP_404_NOT_FOUND)
+    def delete_result(self, request_data, natural_key, serializer_name=None, obj_id=None) -> tuple:
+        '''
+            Удаляет объект из url или пачку tombstone {"data": [{"id": 1}, ...]} одним запросом.
+            Если у сериализатора задан upsert_key, tombstone сопоставляются по его полям.
+        '''
+        if obj_id:
+            tombstones = [{'id': obj_id}]
+        else:
+            tombstones = request_data.get('data') if isinstance(request_data, dict) else request_data
+            if not tombstones or not isinstance(tombstones, list):
+                return {"message": "Не переданы удаляемые объекты"}, status.HTTP_400_BAD_REQUEST
 
-        request_data = self.get_request_data(request)
-        print('request_data', request_data)
+        some_model = self.get_some_model(natural_key)
+        if not some_model:
+            return {"message": "Нет модели с таким натуральным ключом"}, status.HTTP_404_NOT_FOUND
 
-        if not request_data:
-            return Response({"message": "Данные не найдены"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            serializer = self.get_data_connector(some_model, 'DELETE', serializer_name)
+        except:
+            serializer = None
 
-        # data = request_data.get('data')
-        # if not data:
-        #     return Response({"message": "Данные не найдены"}, status=status.HTTP_404_NOT_FOUND)
+        if not serializer:
+            return {"message": "Сериализатор не найден"}, status.HTTP_404_NOT_FOUND
 
-        some_model = self.get_some_model(natural_key)
+        if serializer.is_auto:
+            return {"message": "Автоматический сериализатор только для чтения"}, status.HTTP_405_METHOD_NOT_ALLOWED
+
+        if not serializer.is_allow_delete:
+            return {"message": "Сериализатор не разрешает удаление"}, status.HTTP_403_FORBIDDEN
+
+        with suppress_outbox(self.is_replication_request()):
+            deleted_count, error_data = serializer.delete_data(tombstones, is_by_id=bool(obj_id))
+        self.mark_write()
+
+        return (
+            {
+                "message": f"Удалено объектов: {deleted_count}",
+                "deleted": deleted_count,
+                "errors": error_data,
+            },
+            status.HTTP_200_OK,
+        )
+
+
+class SuperApiBatchView(SuperApiView):
+    """
+        Пакетный super-api: несколько GET/POST/PATCH/DELETE операций за один запрос.
+
+        request.data = {
+            "atomic": bool,
+            "operations": [
+                {
+                    "method": "GET" | "POST" | "PATCH" | "DELETE",
+                    "natural_key": str,
+                    "serializer_name": str,
+                    "obj_id": int,
+                    "params": {"pages__gte": 10, ...},
+                    "data": {...} | [...],
+                },
+                ...
+            ],
+        }
+        Результаты возвращаются в том же порядке, что и операции.
+    """
+    allowed_batch_methods = (
+        'GET',
+        'POST',
+        'PATCH',
+        'DELETE',
+    )
+
+    def get(self, request, *args, **kwargs):
+        return Response({"message": "Пакетные операции передаются через POST"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def patch(self, request, *args, **kwargs):
+        return Response({"message": "Пакетные операции передаются через POST"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def get_operation_params(self, params: dict) -> QueryDict:
+        '''
+            Переводит params операции в QueryDict как у обычного GET. Списки склеиваются через запятую (для __in).
+        '''
+        get_params = QueryDict(mutable=True)
+        for param_key, param_value in (params or {}).items():
+            if isinstance(param_value, list):
+                param_value = ','.join(str(item) for item in param_value)
+            elif isinstance(param_value, bool):
+                param_value = 'true' if param_value else 'false'
+            get_params[param_key] = str(param_value)
+        return get_params
+
+    def run_operation(self, operation: dict) -> tuple:
+        if not isinstance(operation, dict):
+            return {"message": "Операция должна быть объектом"}, status.HTTP_400_BAD_REQUEST
+
+        method = str(operation.get('method', 'GET')).upper()
+        natural_key = operation.get('natural_key')
+        serializer_name = operation.get('serializer_name')
+        obj_id = operation.get('obj_id')
+
+        if method not in self.allowed_batch_methods:
+            return {"message": f"Метод {method} не поддерживается в пакетном запросе"}, status.HTTP_400_BAD_REQUEST
+
+        if not natural_key:
+            return {"message": "Не указан natural_key"}, status.HTTP_400_BAD_REQUEST
+
+        if method == 'GET':
+            get_params = self.get_operation_params(operation.get('params'))
+            is_columnar = get_params.get(api_settings.URL_FORMAT_OVERRIDE) == ColumnarJSONRenderer.format
+            return self.get_result(get_params, natural_key, serializer_name, obj_id, is_columnar)
+
+        if method == 'DELETE':
+            return self.delete_result(operation.get('data'), natural_key, serializer_name, obj_id)
+
+        return self.set_result(operation.get('data'), method, natural_key, serializer_name, obj_id)
+
+    def is_failed_operation(self, operation, response_data, response_status: int) -> bool:
+        '''
+            Нужно ли откатить atomic пакет после операции. GET ничего не меняет (например 404 на пустую выборку),
+            а запись считается неудачной и при статусе 200, если часть объектов вернулась с ошибками (errors).
+        '''
+        if isinstance(operation, dict) and str(operation.get('method', 'GET')).upper() == 'GET':
+            return False
+
+        if response_status >= status.HTTP_400_BAD_REQUEST:
+            return True
+
+        return isinstance(response_data, dict) and bool(response_data.get('errors'))
+
+    def post(self, request, *args, **kwargs):
+        return self.get_idempotent_response(request, 'POST', lambda: self.get_batch_result(self.get_request_data(request)))
+
+    def get_batch_result(self, request_data) -> tuple:
+        operations = request_data.get('operations') if isinstance(request_data, dict) else None
+
+        if not operations or not isinstance(operations, list):
+            return {"message": "Не переданы операции"}, status.HTTP_400_BAD_REQUEST
+
+        if len(operations) > BATCH_MAX_OPERATIONS:
+            return {"message": f"Не больше {BATCH_MAX_OPERATIONS} операций за запрос"}, status.HTTP_400_BAD_REQUEST
+
+        results = []
+        if not request_data.get('atomic'):
+            for operation in operations:
+                response_data, response_status = self.run_operation(operation)
+                results.append({"status": response_status, "data": response_data})
+
+            return {"status": "ok", "results": results}, status.HTTP_200_OK
+
+        try:
+            with transaction.atomic():
+                for operation in operations:
+                    response_data, response_status = self.run_operation(operation)
+                    results.append({"status": response_status, "data": response_data})
+                    if self.is_failed_operation(operation, response_data, response_status):
+                        raise BatchRollback()
+        except BatchRollback:
+            return (
+                {
+                    "status": "error",
+                    "message": f"Операция {len(results) - 1} завершилась ошибкой, изменения отменены",
+                    "results": results,
+                },
+                status.HTTP_400_BAD_REQUEST,
+            )
+
+        return {"status": "ok", "results": results}, status.HTTP_200_OK
+
+
+class ConnectorDefinitionsView(APIView):
+    """
+        Синхронизация описаний коннекторов между сайтами.
+
+        GET - {"fingerprints": {slug: отпечаток}}, с ?connector=a,b - еще и {"definitions": [...]} этих коннекторов.
+        POST {"definitions": [...], "dry_run": bool} - применяет отличающиеся описания одной транзакцией.
+    """
+    permission_classes = [
+        permissions.IsAdminUser,
+    ]
+
+    def get(self, request):
+        slugs = None
+        if request.GET.get('connector'):
+            slugs = [slug for slug in request.GET['connector'].split(',') if slug]
+
+        definitions = dump_definitions(slugs)
+        response_data = {
+            "fingerprints": {slug: get_fingerprint(definition) for slug, definition in definitions.items()},
+        }
+        if slugs is not None:
+            response_data['definitions'] = list(definitions.values())
+
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        definitions = request.data.get('definitions') if isinstance(request.data, dict) else None
+        if not isinstance(definitions, list):
+            return Response({"message": "Ожидается {\"definitions\": [...]}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = apply_definitions(definitions, dry_run=bool(request.data.get('dry_run')))
+        except DefinitionError as error:
+            return Response({"message": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({"message": "ok", **result}, status=status.HTTP_200_OK)
+
+
+class AsyncSuperApiView(
+    SuperApiMixin,
+    View,
+):
+    """
+        Асинхронный вариант super-api для ASGI: запросы к БД идут через async ORM,
+        поэтому медленные клиенты не держат поток воркера.
+        Аутентификация выполняется классами из REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'],
+        права проверяются по permission_classes, как в SuperApiView.
+    """
+    permission_classes = [
+        permissions.IsAuthenticated,
+    ]
+
+    def get_response(self, response_data: dict, response_status: int = status.HTTP_200_OK) -> HttpResponse:
+        return HttpResponse(
+            dumps(response_data),
+            status=response_status,
+            content_type='application/json',
+        )
+
+    async def get_user(self, drf_request):
+        return await sync_to_async(lambda: drf_request.user)()
+
+    async def has_permissions(self, drf_request) -> bool:
+        """
+            Проверка permission_classes, как в APIView.check_permissions().
+        """
+        def has_permissions():
+            return all(
+                permission_class().has_permission(drf_request, self)
+                for permission_class in self.permission_classes
+            )
+        return await sync_to_async(has_permissions)()
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request = Request(
+            request,
+            authenticators=[authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+        )
+        try:
+            user = await self.get_user(drf_request)
+            is_allowed = await self.has_permissions(drf_request)
+        except APIException as error:
+            return self.get_response({"status": "error", "message": str(error.detail)}, error.status_code)
+
+        if not is_allowed:
+            if not user or not user.is_authenticated:
+                return self.get_response({"status": "error", "message": "Требуется аутентификация"}, status.HTTP_401_UNAUTHORIZED)
+            return self.get_response({"status": "error", "message": "Недостаточно прав"}, status.HTTP_403_FORBIDDEN)
+
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_request_data(self, request):
+        request_data = {}
+        if request.body:
+            request_data = loads(request.body)
+
+        return request_data
+
+    async def get(self, request, natural_key, serializer_name=None, obj_id=None):
+        some_model = await sync_to_async(self.get_some_model)(natural_key)
+        if not some_model:
+            return self.get_response({"status": "error", "message": "Нет модели с таким натуральным ключом"}, status.HTTP_404_NOT_FOUND)
+
+        if obj_id:
+            obj = await some_model.objects.filter(id=obj_id).afirst()
+            if not obj:
+                return self.get_response({"status": "error", "message": "Нет объекта с таким id"}, status.HTTP_404_NOT_FOUND)
+
+        try:
+            serializer = await sync_to_async(DataConnector.get_serializer)(some_model, serializer_name=serializer_name)
+        except:
+            serializer = None
+
+        if not serializer:
+            return self.get_response({"status": "error", "message": "У модели нет сериализатора"}, status.HTTP_404_NOT_FOUND)
+
+        try:
+            queryset = await sync_to_async(self.get_queryset)(some_model, obj_id, request.GET, serializer)
+        except FilterError as error:
+            return self.get_response({"status": "error", "message": str(error)}, status.HTTP_400_BAD_REQUEST)
+
+        if not await queryset.aexists():
+            return self.get_response({"status": "error", "message": "Нет queryset"}, status.HTTP_404_NOT_FOUND)
+
+        include = [include_key for include_key in request.GET.get('include', '').split(',') if include_key]
+        included = None
+        if include:
+            try:
+                sideloaded_data = await sync_to_async(
+                    lambda: materialize(serializer.get_sideloaded_data(queryset, include))
+                )()
+            except IncludeError as error:
+                return self.get_response({"status": "error", "message": str(error)}, status.HTTP_400_BAD_REQUEST)
+
+            data = sideloaded_data['data']
+            included = sideloaded_data['included']
+
+        elif request.GET.get(api_settings.URL_FORMAT_OVERRIDE) == ColumnarJSONRenderer.format:
+            data = await sync_to_async(lambda: materialize(serializer.get_columnar_data(queryset)))()
+        else:
+            data = await serializer.aget_data(queryset)
+            if data is None:
+                return self.get_response({"status": "error", "message": "Ошибка сериализации"}, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        if not data:
+            return self.get_response({"status": "error", "message": "Нет данных"}, status.HTTP_404_NOT_FOUND)
+
+        response_data = {"status": "ok", "message": "", "data": data}
+        if included is not None:
+            response_data['included'] = included
+
+        return self.get_response(response_data)
+
+    async def set_data(self, request, method: str, natural_key, serializer_name=None, obj_id=None, record: Optional[IdempotencyKey] = None):
+        request_data = self.get_request_data(request)
+        if not request_data:
+            return self.get_response({"message": "Данные не найдены"}, status.HTTP_404_NOT_FOUND)
+
+        some_model = await sync_to_async(self.get_some_model)(natural_key)
         if not some_model:
-            return Response({"message": "Нет модели с таким натуральным ключом"}, status=status.HTTP_404_NOT_FOUND)
+            return self.get_response({"message": "Нет модели с таким натуральным ключом"}, status.HTTP_404_NOT_FOUND)
 
         serializer_self_assembly_data = None
         if type(request_data) == dict:
             serializer_self_assembly_data = request_data.get('serializer_self_assembly_data')
 
         try:
-            serializer = DataConnector.get_serializer(
+            serializer = await sync_to_async(DataConnector.get_serializer)(
                 some_model,
-                'PATCH',
-                serializer_name, 
+                method,
+                serializer_name,
                 serializer_self_assembly_data,
             )
+        except DefinitionForbidden as error:
+            return self.get_response(
+                {"message": f"serializer_self_assembly_data: {error}"},
+                status.HTTP_403_FORBIDDEN,
+            )
+        except DefinitionError as error:
+            return self.get_response(
+                {"message": f"Ошибка в serializer_self_assembly_data: {error}"},
+                status.HTTP_400_BAD_REQUEST,
+            )
         except:
             serializer = None
 
         if not serializer:
-            return Response({"message": "Сериализатор не найден"}, status=status.HTTP_404_NOT_FOUND)       
+            return self.get_response({"message": "Сериализатор не найден"}, status.HTTP_404_NOT_FOUND)
 
-        comment, response_status, response_data = serializer.set_data(request_data, method='PATCH', obj_id=obj_id) 
+        if serializer.is_auto:
+            return self.get_response(
+                {"message": "Автоматический сериализатор только для чтения"},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
 
-        return Response(
-            {
-                "message": comment,
-                "data": response_data,
-            }, 
-            status=response_status,
+        if not serializer.is_method_allowed(method):
+            return self.get_response({"message": f"Сериализатор не разрешает {method}"}, status.HTTP_403_FORBIDDEN)
+
+        is_replication = self.is_replication_request()
+
+        def get_result():
+            with suppress_outbox(is_replication):
+                comment, response_status, response_data = serializer.set_data(request_data, method=method, obj_id=obj_id)
+            return materialize({"message": comment, "data": response_data}), response_status
+
+        # Запись и сохранение ответа для Idempotency-Key выполняются одной транзакцией
+        response_data, response_status = await sync_to_async(self.run_idempotent)(record, get_result)
+        await sync_to_async(self.mark_write)()
+
+        return self.get_response(response_data, response_status)
+
+    async def get_idempotent_response(self, request, method: str, get_response) -> HttpResponse:
+        '''
+            Как SuperApiView.get_idempotent_response(), get_response(record) - корутина, возвращающая HttpResponse.
+            Запись сохраняет ответ в record сама, в своей транзакции (см. set_data), остальные ответы сохраняются здесь.
+        '''
+        try:
+            record, stored_response = await sync_to_async(self.claim_idempotency_key)(request, method)
+        except IdempotencyConflict as error:
+            return self.get_response({"message": str(error)}, error.status_code)
+
+        if stored_response:
+            response = self.get_response(*stored_response)
+            response[IDEMPOTENCY_REPLAYED_HEADER] = 'true'
+            return response
+
+        if record is None:
+            return await get_response(None)
+
+        try:
+            response = await get_response(record)
+        except BaseException:
+            if record.pk is not None:
+                await sync_to_async(record.delete)()
+            raise
+
+        if record.pk is not None and record.status is None:
+            await sync_to_async(record.save_response)(loads(response.content), response.status_code)
+        return response
+
+    async def post(self, request, natural_key, serializer_name=None, obj_id=None):
+        if obj_id:
+            return self.get_response({"message": "Нельзя задать id для создаваемого обьекта"}, status.HTTP_404_NOT_FOUND)
+
+        return await self.get_idempotent_response(
+            request,
+            'POST',
+            lambda record: self.set_data(request, 'POST', natural_key, serializer_name, record=record),
+        )
+
+    async def patch(self, request, natural_key, serializer_name=None, obj_id=None):
+        if not obj_id:
+            return self.get_response({"message": "В url не задан id для обновляемого обьекта"}, status.HTTP_404_NOT_FOUND)
+
+        return await self.get_idempotent_response(
+            request,
+            'PATCH',
+            lambda record: self.set_data(request, 'PATCH', natural_key, serializer_name, obj_id, record=record),
         )
-    
-    def put(self, request, natural_key, serializer_name=None, obj_id=None):
-        return Response({"message": "ok"}, status=status.HTTP_200_OK)
-    
-    def delete(self, request, natural_key, obj_id=None):
-        return Response({"message": "ok"}, status=status.HTTP_200_OK)
-    
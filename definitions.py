@@ -0,0 +1,653 @@
+import json
+import time
+import hashlib
+import threading
+
+from typing import Optional
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.contenttypes.models import ContentType
+
+from .module_settings import (
+    SELF_ASSEMBLY_CACHE_SIZE,
+    SELF_ASSEMBLY_CACHE_TTL,
+    BULK_BATCH_SIZE,
+    AUTO_SERIALIZER_EXCLUDED_APPS,
+    AUTO_SERIALIZER_EXCLUDED_FIELDS,
+    AUTO_SERIALIZER_LOOKUP_TTL,
+)
+
+
+# Версия формата описания коннектора. Описания более новой версии не принимаются
+DEFINITION_VERSION = 1
+
+# Поля DataConnector, которые переносятся между сайтами
+CONNECTOR_DEFINITION_KEYS = (
+    'name',
+    'is_active',
+    'is_allow_view',
+    'is_allow_edit',
+    'is_allow_delete',
+    'is_allow_create',
+    'is_allow_self_assembly',
+    'upsert_key',
+)
+# Поля SerializerField, которые сравниваются и переносятся как есть (без связей)
+SERIALIZER_FIELD_ATTRS = (
+    'name',
+    'alt_key',
+    'type',
+    'is_active',
+    'max_depth',
+)
+
+# Ключ входящих данных с описанием коннектора для самосборки
+SELF_ASSEMBLY_KEY = 'serializer_self_assembly_data'
+
+# Поля описания поля сериализатора, которые переносятся как есть
+FIELD_DEFINITION_KEYS = (
+    'slug',
+    'name',
+    'alt_key',
+    'type',
+    'is_active',
+    'max_depth',
+    'handler',
+    'incoming_handler',
+    'serializer',
+)
+
+# Собранные коннекторы: (модель, базовый коннектор, его версия, отпечаток описания) -> DataConnector
+_assembled_connectors = OrderedDict()
+_assembled_connectors_lock = threading.Lock()
+# id базового коннектора -> (версия его активных полей, время загрузки)
+_base_field_versions = {}
+
+# Автоматические коннекторы по классу модели, живут все время процесса
+_auto_connectors = {}
+# id ContentType моделей, у которых есть DataConnector, и время их загрузки
+_configured_content_types = {'ids': None, 'loaded': 0}
+
+
+class DefinitionError(ValueError):
+    """
+        Ошибка в описании коннектора.
+    """
+
+
+class DefinitionForbidden(DefinitionError):
+    """
+        Описание запрашивает то, что не разрешено коннектором модели (самосборка, метод, поле, обработчик).
+    """
+
+
+def get_fingerprint(definition: dict) -> str:
+    """
+        Стабильный хеш описания: не зависит от порядка ключей и форматирования.
+    """
+    canonical = json.dumps(
+        definition,
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_model_class(definition: dict, some_model=None):
+    model_label = definition.get('model')
+    if not model_label:
+        if some_model is None:
+            raise DefinitionError('Не указана модель')
+        return some_model
+
+    try:
+        model_class = apps.get_model(model_label)
+    except (LookupError, ValueError):
+        raise DefinitionError(f'Нет модели "{model_label}"')
+
+    if some_model is not None and model_class is not some_model:
+        raise DefinitionError(f'Описание относится к модели "{model_label}", а не к {some_model._meta.label}')
+
+    return model_class
+
+
+def get_by_slugs(model_class, slugs) -> dict:
+    """
+        Объекты по slug одним запросом. slug обработчиков не уникален, при повторах берется первый.
+    """
+    slugs = {slug for slug in slugs if slug}
+    objects = {}
+    if slugs:
+        for obj in model_class.objects.filter(slug__in=slugs).order_by('-id'):
+            objects[obj.slug] = obj
+    return objects
+
+
+def build_connector(definition: dict, some_model=None, base_connector=None):
+    """
+        Собирает несохраненный DataConnector с полями из описания:
+        {"model": "app_label.Model", "upsert_key": ..., "fields": [{"slug": ..., "alt_key": ..., "handler": ...}, ...]}.
+        Поля проверяются по модели, обработчики и вложенные сериализаторы ищутся по slug.
+
+        С base_connector (самосборка во входящих данных) описание может только выбрать часть его полей:
+        поля и ключ сопоставления - только из активных полей base_connector, обработчики - те же, что у его полей,
+        разрешения копируются с него.
+    """
+    from .models import DataConnector, SerializerField, FieldHandler, IncomingFieldHandler
+
+    if not isinstance(definition, dict):
+        raise DefinitionError('Описание коннектора должно быть объектом')
+
+    field_definitions = definition.get('fields')
+    if not isinstance(field_definitions, list) or not field_definitions:
+        raise DefinitionError('В описании нет полей')
+
+    model_class = get_model_class(definition, some_model)
+    data_connector = DataConnector(
+        name=definition.get('name'),
+        content_type=ContentType.objects.get_for_model(model_class),
+        upsert_key=definition.get('upsert_key'),
+    )
+
+    base_fields = None
+    if base_connector is not None:
+        base_fields = {
+            serializer_field.slug: serializer_field
+            for serializer_field in base_connector.get_active_serializer_fields()
+        }
+        for flag in ('is_active', 'is_allow_view', 'is_allow_edit', 'is_allow_delete', 'is_allow_create'):
+            setattr(data_connector, flag, getattr(base_connector, flag))
+        if not data_connector.upsert_key:
+            data_connector.upsert_key = base_connector.upsert_key
+        for field_name in (data_connector.upsert_key or '').split(','):
+            if field_name.strip() and field_name.strip() not in base_fields:
+                raise DefinitionForbidden(f'Поле ключа сопоставления "{field_name.strip()}" не разрешено коннектором')
+
+    serializer_fields = []
+    handler_slugs = {}
+    for field_definition in field_definitions:
+        if not isinstance(field_definition, dict) or not field_definition.get('slug'):
+            raise DefinitionError('У поля не указан slug')
+
+        unknown_keys = set(field_definition) - set(FIELD_DEFINITION_KEYS)
+        if unknown_keys:
+            raise DefinitionError(f'Неизвестные ключи поля: {", ".join(sorted(unknown_keys))}')
+
+        slug = field_definition['slug']
+        if base_fields is not None and slug not in base_fields:
+            raise DefinitionForbidden(f'Поле "{slug}" не разрешено коннектором модели {model_class._meta.label}')
+
+        try:
+            model_field = model_class._meta.get_field(slug)
+        except FieldDoesNotExist:
+            raise DefinitionError(f'Поле "{slug}" не является полем модели {model_class._meta.label}')
+
+        field_type = field_definition.get('type') or model_field.get_internal_type()
+        serializer_field = SerializerField(
+            name=field_definition.get('name') or slug,
+            slug=slug,
+            alt_key=field_definition.get('alt_key'),
+            type=field_type,
+            is_active=field_definition.get('is_active', True),
+            max_depth=field_definition.get('max_depth'),
+        )
+        serializer_fields.append((serializer_field, field_definition))
+        # Как при создании полей в signals: обработчик по умолчанию совпадает с типом поля
+        handler_slugs[slug] = field_definition.get('handler') or ('default' if field_type == 'AutoField' else field_type)
+
+    handlers = get_by_slugs(FieldHandler, handler_slugs.values())
+    incoming_handlers = get_by_slugs(
+        IncomingFieldHandler,
+        [field_definition.get('incoming_handler') for _, field_definition in serializer_fields],
+    )
+    nested_connectors = get_by_slugs(
+        DataConnector,
+        [field_definition.get('serializer') for _, field_definition in serializer_fields],
+    )
+
+    for serializer_field, field_definition in serializer_fields:
+        if base_fields is not None:
+            set_base_handlers(serializer_field, field_definition, base_fields[serializer_field.slug])
+            continue
+
+        handler_slug = handler_slugs[serializer_field.slug]
+        if field_definition.get('handler') and handler_slug not in handlers:
+            raise DefinitionError(f'Нет обработчика "{handler_slug}"')
+        serializer_field.handler = handlers.get(handler_slug)
+
+        if field_definition.get('incoming_handler'):
+            serializer_field.incoming_handler = incoming_handlers.get(field_definition['incoming_handler'])
+            if not serializer_field.incoming_handler:
+                raise DefinitionError(f'Нет обработчика входящих данных "{field_definition["incoming_handler"]}"')
+
+        if field_definition.get('serializer'):
+            serializer_field.serializer = nested_connectors.get(field_definition['serializer'])
+            if not serializer_field.serializer:
+                raise DefinitionError(f'Нет сериализатора "{field_definition["serializer"]}"')
+
+    data_connector.assembled_fields = [
+        serializer_field for serializer_field, _ in serializer_fields if serializer_field.is_active
+    ]
+    if data_connector.upsert_key:
+        try:
+            data_connector.get_upsert_fields()
+        except FieldDoesNotExist as error:
+            raise DefinitionError(f'Некорректный upsert_key: {error}')
+
+    return data_connector
+
+
+def set_base_handlers(serializer_field, field_definition: dict, base_field):
+    """
+        Обработчики поля самосборки берутся с поля коннектора модели, другие обработчики не принимаются.
+    """
+    for key in ('handler', 'incoming_handler'):
+        base_handler = getattr(base_field, key)
+        if field_definition.get(key) and field_definition[key] != getattr(base_handler, 'slug', None):
+            raise DefinitionForbidden(f'Обработчик поля "{serializer_field.slug}" нельзя заменить')
+        setattr(serializer_field, key, base_handler)
+
+    serializer_field.type = base_field.type
+
+    nested_slug = field_definition.get('serializer')
+    base_nested = base_field.serializer
+    if nested_slug and nested_slug != getattr(base_nested, 'slug', None):
+        raise DefinitionForbidden(f'Вложенный сериализатор поля "{serializer_field.slug}" нельзя заменить')
+    serializer_field.serializer = base_nested
+
+
+def get_base_version(base_connector) -> Optional[str]:
+    """
+        Версия базового коннектора: его разрешения (объект читается на каждый запрос) и активные поля.
+        Поля перечитываются раз в SELF_ASSEMBLY_CACHE_TTL секунд (в этом процессе - сразу после изменения),
+        поэтому отключенное поле перестает приниматься через уже собранные коннекторы.
+    """
+    if base_connector is None:
+        return None
+
+    now = time.monotonic()
+    fields_version, loaded = _base_field_versions.get(base_connector.id, (None, 0))
+    if fields_version is None or now - loaded > SELF_ASSEMBLY_CACHE_TTL:
+        fields_version = get_fingerprint(list(
+            base_connector.serializer_fields.filter(is_active=True).order_by('id').values_list(
+                'id', 'slug', 'alt_key', 'type', 'max_depth', 'handler_id', 'incoming_handler_id', 'serializer_id',
+            )
+        ))
+        _base_field_versions[base_connector.id] = (fields_version, now)
+
+    return get_fingerprint({
+        'connector': {key: getattr(base_connector, key) for key in CONNECTOR_DEFINITION_KEYS},
+        'fields': fields_version,
+    })
+
+
+def get_assembled_connector(definition: dict, some_model=None, base_connector=None):
+    """
+        Возвращает собранный коннектор из кэша по отпечатку описания и версии базового коннектора.
+        Повторные запросы с тем же описанием не разбирают и не проверяют его заново.
+    """
+    fingerprint = get_fingerprint(definition)
+    key = (
+        some_model._meta.label if some_model is not None else None,
+        base_connector.id if base_connector is not None else None,
+        get_base_version(base_connector),
+        fingerprint,
+    )
+
+    with _assembled_connectors_lock:
+        data_connector = _assembled_connectors.get(key)
+        if data_connector is not None:
+            _assembled_connectors.move_to_end(key)
+            return data_connector
+
+    data_connector = build_connector(definition, some_model, base_connector)
+    data_connector.fingerprint = fingerprint
+
+    with _assembled_connectors_lock:
+        _assembled_connectors[key] = data_connector
+        while len(_assembled_connectors) > SELF_ASSEMBLY_CACHE_SIZE:
+            _assembled_connectors.popitem(last=False)
+
+    return data_connector
+
+
+def clear_assembled_connectors():
+    with _assembled_connectors_lock:
+        _assembled_connectors.clear()
+    _base_field_versions.clear()
+    _configured_content_types['ids'] = None
+
+
+def get_auto_field_definition(model_field) -> Optional[tuple]:
+    """
+        (тип, slug обработчика) поля для автоматического коннектора или None, если поле не отдается.
+    """
+    if not getattr(model_field, 'concrete', False) or model_field.many_to_many:
+        return None
+    if model_field.name in AUTO_SERIALIZER_EXCLUDED_FIELDS:
+        return None
+
+    if model_field.is_relation:
+        if not model_field.many_to_one and not model_field.one_to_one:
+            return None
+        # Отдается id связанного объекта, как обработчиком ForeignKey, поэтому значение берется из колонки
+        return 'ForeignKey', 'ForeignKey'
+
+    field_type = model_field.get_internal_type()
+    if field_type in ('FileField', 'ImageField'):
+        return field_type, 'FileField'
+    return field_type, 'default'
+
+
+def build_auto_connector(model_class):
+    """
+        Собирает коннектор из _meta модели без запросов к БД: обработчики - несохраненные объекты,
+        поведение которых определяется только slug.
+    """
+    from .models import DataConnector, SerializerField, FieldHandler
+
+    data_connector = DataConnector(
+        name=f'auto: {model_class._meta.label}',
+        content_type=ContentType.objects.get_for_model(model_class),
+        is_allow_view=True,
+        is_allow_edit=False,
+        is_allow_delete=False,
+        is_allow_create=False,
+    )
+    data_connector.is_auto = True
+    handlers = {}
+    serializer_fields = []
+    for model_field in model_class._meta.get_fields():
+        field_definition = get_auto_field_definition(model_field)
+        if not field_definition:
+            continue
+
+        field_type, handler_slug = field_definition
+        if handler_slug not in handlers:
+            handlers[handler_slug] = FieldHandler(name=handler_slug, slug=handler_slug)
+        serializer_fields.append(SerializerField(
+            name=str(getattr(model_field, 'verbose_name', model_field.name)),
+            slug=model_field.name,
+            type=field_type,
+            handler=handlers[handler_slug],
+        ))
+
+    data_connector.assembled_fields = serializer_fields
+    return data_connector
+
+
+def get_auto_connector(model_class):
+    """
+        Автоматический коннектор модели. План строится один раз на процесс.
+        Модель пользователей (settings.AUTH_USER_MODEL) не отдается никогда, даже если она вне приложения auth.
+    """
+    if model_class._meta.app_label in AUTO_SERIALIZER_EXCLUDED_APPS:
+        return None
+    if model_class._meta.label_lower == settings.AUTH_USER_MODEL.lower():
+        return None
+
+    data_connector = _auto_connectors.get(model_class)
+    if data_connector is None:
+        data_connector = _auto_connectors.setdefault(model_class, build_auto_connector(model_class))
+    return data_connector
+
+
+def has_configured_connector(content_type_id: int) -> bool:
+    """
+        Есть ли у модели DataConnector. Список перечитывается раз в AUTO_SERIALIZER_LOOKUP_TTL секунд
+        (и сразу после изменения коннекторов в этом процессе), поэтому ненастроенные модели
+        отдаются без запросов к настройкам.
+    """
+    from .models import DataConnector
+
+    now = time.monotonic()
+    content_type_ids = _configured_content_types['ids']
+    if content_type_ids is None or now - _configured_content_types['loaded'] > AUTO_SERIALIZER_LOOKUP_TTL:
+        content_type_ids = set(
+            DataConnector.objects.filter(content_type__isnull=False).values_list('content_type_id', flat=True)
+        )
+        _configured_content_types['ids'] = content_type_ids
+        _configured_content_types['loaded'] = now
+
+    return content_type_id in content_type_ids
+
+
+def dump_field(serializer_field) -> dict:
+    field_definition = {'slug': serializer_field.slug}
+    for attr in SERIALIZER_FIELD_ATTRS:
+        field_definition[attr] = getattr(serializer_field, attr)
+    field_definition['handler'] = serializer_field.handler.slug if serializer_field.handler else None
+    field_definition['incoming_handler'] = serializer_field.incoming_handler.slug if serializer_field.incoming_handler else None
+    field_definition['serializer'] = serializer_field.serializer.slug if serializer_field.serializer else None
+    return field_definition
+
+
+def get_field_sort_key(serializer_field) -> tuple:
+    return serializer_field.slug or '', serializer_field.id
+
+
+def dump_connector(data_connector) -> dict:
+    """
+        Описание коннектора вместе с полями. Связи указываются по slug, поэтому описание переносимо между сайтами
+        и может использоваться в serializer_self_assembly_data.
+    """
+    content_type = data_connector.content_type
+    definition = {
+        'version': DEFINITION_VERSION,
+        'slug': data_connector.slug,
+        'model': f'{content_type.app_label}.{content_type.model}' if content_type else None,
+    }
+    for key in CONNECTOR_DEFINITION_KEYS:
+        definition[key] = getattr(data_connector, key)
+
+    # Порядок по slug одинаков на всех сайтах (id локальные), поэтому не меняет отпечаток.
+    # id различает только повторы одного slug
+    definition['fields'] = [
+        dump_field(serializer_field)
+        for serializer_field in sorted(data_connector.serializer_fields.all(), key=get_field_sort_key)
+    ]
+    return definition
+
+
+def get_definition_queryset(slugs=None):
+    from .models import DataConnector
+
+    queryset = DataConnector.objects.exclude(slug__isnull=True).exclude(slug='').select_related(
+        'content_type',
+    ).prefetch_related(
+        'serializer_fields__handler',
+        'serializer_fields__incoming_handler',
+        'serializer_fields__serializer',
+    )
+    if slugs is not None:
+        queryset = queryset.filter(slug__in=slugs)
+    return queryset
+
+
+def dump_definitions(slugs=None) -> dict:
+    """
+        {slug: описание} всех коннекторов со slug (или только указанных).
+    """
+    return {data_connector.slug: dump_connector(data_connector) for data_connector in get_definition_queryset(slugs)}
+
+
+def get_fingerprints(slugs=None) -> dict:
+    return {slug: get_fingerprint(definition) for slug, definition in dump_definitions(slugs).items()}
+
+
+def get_changed_slugs(local_fingerprints: dict, remote_fingerprints: dict) -> list:
+    """
+        slug коннекторов, которые есть у источника и отличаются (или отсутствуют) у получателя.
+    """
+    return sorted(
+        slug for slug, fingerprint in local_fingerprints.items()
+        if remote_fingerprints.get(slug) != fingerprint
+    )
+
+
+def validate_definition(definition) -> str:
+    if not isinstance(definition, dict):
+        raise DefinitionError('Описание коннектора должно быть объектом')
+
+    version = definition.get('version')
+    if not isinstance(version, int) or version > DEFINITION_VERSION:
+        raise DefinitionError(f'Неподдерживаемая версия описания: {version}')
+
+    slug = definition.get('slug')
+    if not slug:
+        raise DefinitionError('У коннектора не указан slug')
+
+    if not isinstance(definition.get('fields'), list):
+        raise DefinitionError(f'У коннектора "{slug}" нет списка полей')
+
+    for field_definition in definition['fields']:
+        if not isinstance(field_definition, dict) or not field_definition.get('slug'):
+            raise DefinitionError(f'У поля коннектора "{slug}" не указан slug')
+
+    return slug
+
+
+def get_or_create_by_slugs(model_class, slugs) -> dict:
+    """
+        Обработчики по slug; недостающие создаются одним запросом (обработчик определяется своим slug).
+    """
+    objects = get_by_slugs(model_class, slugs)
+    missing_slugs = {slug for slug in slugs if slug} - set(objects)
+    if missing_slugs:
+        model_class.objects.bulk_create([model_class(name=slug, slug=slug) for slug in sorted(missing_slugs)])
+        objects.update(get_by_slugs(model_class, missing_slugs))
+    return objects
+
+
+def apply_definitions(definitions: list, dry_run: bool = False) -> dict:
+    """
+        Приводит коннекторы к присланным описаниям одной транзакцией.
+        Совпадающие по отпечатку описания пропускаются, остальные применяются как разница:
+        bulk_create/bulk_update/delete для коннекторов и их полей без сохранения каждого поля по отдельности.
+        Возвращает {"created": [...], "updated": [...], "unchanged": [...]}.
+    """
+    from .models import DataConnector, SerializerField, FieldHandler, IncomingFieldHandler
+
+    definitions_by_slug = {}
+    for definition in definitions:
+        definitions_by_slug[validate_definition(definition)] = definition
+
+    local_definitions = dump_definitions(list(definitions_by_slug))
+    result = {'created': [], 'updated': [], 'unchanged': []}
+    changed_definitions = {}
+    for slug, definition in definitions_by_slug.items():
+        if slug not in local_definitions:
+            result['created'].append(slug)
+        elif get_fingerprint(local_definitions[slug]) != get_fingerprint(definition):
+            result['updated'].append(slug)
+        else:
+            result['unchanged'].append(slug)
+            continue
+        changed_definitions[slug] = definition
+
+    if not changed_definitions or dry_run:
+        return result
+
+    content_types = {}
+    for slug, definition in changed_definitions.items():
+        if definition.get('model'):
+            model_class = get_model_class(definition)
+            content_types[slug] = ContentType.objects.get_for_model(model_class)
+
+    with transaction.atomic():
+        existing_connectors = get_by_slugs(DataConnector, changed_definitions)
+        new_connectors = []
+        for slug, definition in changed_definitions.items():
+            data_connector = existing_connectors.get(slug) or DataConnector(slug=slug)
+            data_connector.content_type = content_types.get(slug)
+            for key in CONNECTOR_DEFINITION_KEYS:
+                if key in definition:
+                    setattr(data_connector, key, definition[key])
+            if slug not in existing_connectors:
+                new_connectors.append(data_connector)
+
+        # bulk_create не вызывает post_save, поэтому поля не создаются автоматически по модели
+        DataConnector.objects.bulk_create(new_connectors)
+        if existing_connectors:
+            DataConnector.objects.bulk_update(
+                list(existing_connectors.values()),
+                fields=['content_type', *CONNECTOR_DEFINITION_KEYS],
+            )
+
+        connectors = get_by_slugs(DataConnector, changed_definitions)
+        field_definitions = [
+            field_definition
+            for definition in changed_definitions.values()
+            for field_definition in definition['fields']
+        ]
+        handlers = get_or_create_by_slugs(FieldHandler, {field_definition.get('handler') for field_definition in field_definitions})
+        incoming_handlers = get_or_create_by_slugs(
+            IncomingFieldHandler,
+            {field_definition.get('incoming_handler') for field_definition in field_definitions},
+        )
+        nested_connectors = get_by_slugs(DataConnector, {field_definition.get('serializer') for field_definition in field_definitions})
+
+        existing_fields = {}
+        for serializer_field in SerializerField.objects.filter(data_connector__in=connectors.values()).order_by('slug', 'id'):
+            existing_fields.setdefault((serializer_field.data_connector_id, serializer_field.slug), []).append(serializer_field)
+
+        new_fields = []
+        changed_fields = []
+        for slug, definition in changed_definitions.items():
+            data_connector = connectors[slug]
+            for field_definition in definition['fields']:
+                related = {
+                    'handler': handlers.get(field_definition.get('handler')),
+                    'incoming_handler': incoming_handlers.get(field_definition.get('incoming_handler')),
+                    'serializer': nested_connectors.get(field_definition.get('serializer')),
+                }
+                if field_definition.get('serializer') and not related['serializer']:
+                    raise DefinitionError(f'Нет сериализатора "{field_definition["serializer"]}" для поля коннектора "{slug}"')
+
+                same_slug_fields = existing_fields.get((data_connector.id, field_definition['slug']))
+                if same_slug_fields:
+                    serializer_field = same_slug_fields.pop(0)
+                    is_changed = False
+                    for attr in SERIALIZER_FIELD_ATTRS:
+                        if attr in field_definition and getattr(serializer_field, attr) != field_definition[attr]:
+                            setattr(serializer_field, attr, field_definition[attr])
+                            is_changed = True
+                    for attr, related_object in related.items():
+                        if getattr(serializer_field, f'{attr}_id') != (related_object.id if related_object else None):
+                            setattr(serializer_field, attr, related_object)
+                            is_changed = True
+                    if is_changed:
+                        changed_fields.append(serializer_field)
+                    continue
+
+                serializer_field = SerializerField(data_connector=data_connector, slug=field_definition['slug'], **related)
+                for attr in SERIALIZER_FIELD_ATTRS:
+                    if field_definition.get(attr) is not None:
+                        setattr(serializer_field, attr, field_definition[attr])
+                new_fields.append(serializer_field)
+
+        removed_ids = [
+            serializer_field.id
+            for same_slug_fields in existing_fields.values()
+            for serializer_field in same_slug_fields
+        ]
+        if removed_ids:
+            SerializerField.objects.filter(id__in=removed_ids).delete()
+        if changed_fields:
+            SerializerField.objects.bulk_update(
+                changed_fields,
+                fields=[*SERIALIZER_FIELD_ATTRS, 'handler', 'incoming_handler', 'serializer'],
+                batch_size=BULK_BATCH_SIZE,
+            )
+        SerializerField.objects.bulk_create(new_fields, batch_size=BULK_BATCH_SIZE)
+
+    # Массовые операции не вызывают сигналы, поэтому кэш самосборки сбрасывается здесь
+    clear_assembled_connectors()
+    return result
@@ -0,0 +1,65 @@
+import json
+import decimal
+
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """
+        Кодировщик DRF (datetime, Decimal, UUID, ленивые queryset вроде values_list у ManyToMany).
+        decimal_as_str - Decimal строкой без потери точности (тела передатчиков и выгрузки).
+    """
+    decimal_as_str = False
+
+    def default(self, obj):
+        if self.decimal_as_str and isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+class DecimalStrJSONEncoder(JSONEncoder):
+    decimal_as_str = True
+
+
+_default_encoder = JSONEncoder()
+_decimal_str_encoder = DecimalStrJSONEncoder()
+
+if orjson is not None:
+    # Ключи error_data - числа (индексы объектов), время в UTC как у DRF: ...Z
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps(data, decimal_as_str: bool = False) -> bytes:
+    """
+        Кодирует data в компактный JSON (UTF-8). Если установлен orjson, используется он:
+        встроенные типы, datetime и UUID кодируются на C, остальное - через JSONEncoder.default().
+        Без orjson (или если orjson не смог закодировать значение) используется стандартный json.
+    """
+    encoder = _decimal_str_encoder if decimal_as_str else _default_encoder
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Например целые больше 64 бит
+            pass
+
+    return json.dumps(
+        data,
+        cls=encoder.__class__,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ).encode('utf-8')
+
+
+def loads(data):
+    """
+        Разбирает JSON из bytes или str.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,286 @@
+import logging
+
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from urllib.parse import unquote
+
+from django.apps import apps
+from django.db.models import Q
+from django.http.request import QueryDict
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+
+from .module_settings import FILTER_PLAN_CACHE_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+# Лукапы, которые можно указать в GET параметрах: ?pages__gte=10, ?status__in=new,pending
+FILTER_LOOKUPS = (
+    'exact',
+    'in',
+    'gt',
+    'gte',
+    'lt',
+    'lte',
+    'isnull',
+    'contains',
+    'icontains',
+    'startswith',
+    'istartswith',
+)
+# Суффикс отрицания: ?status__not=new, ?status__in__not=new,pending
+NEGATION_SUFFIX = 'not'
+# Группа условий через ИЛИ: ?or=pages__gte=10|is_viewed=true
+OR_PARAM = 'or'
+OR_SEPARATOR = '|'
+LIST_SEPARATOR = ','
+
+INTEGER_TYPES = (
+    'AutoField',
+    'BigAutoField',
+    'SmallAutoField',
+    'IntegerField',
+    'BigIntegerField',
+    'SmallIntegerField',
+    'PositiveIntegerField',
+    'PositiveBigIntegerField',
+    'PositiveSmallIntegerField',
+    'ForeignKey',
+    'OneToOneField',
+    'ManyToManyField',
+)
+
+# Поля, по которым уже было выведено предупреждение об отсутствии индекса
+_warned_not_indexed = set()
+
+
+class FilterError(ValueError):
+    """
+        Ошибка разбора GET параметров фильтра.
+    """
+
+
+def to_bool(value: str) -> bool:
+    if value in ('True', 'true', '1'):
+        return True
+    if value in ('False', 'false', '0'):
+        return False
+    raise ValueError(f'"{value}" не является булевым значением')
+
+
+def to_date(value: str):
+    result = parse_date(value)
+    if result is None:
+        raise ValueError(f'"{value}" не является датой')
+    return result
+
+
+def to_datetime(value: str):
+    result = parse_datetime(value) or parse_date(value)
+    if result is None:
+        raise ValueError(f'"{value}" не является датой и временем')
+    return result
+
+
+def to_time(value: str):
+    result = parse_time(value)
+    if result is None:
+        raise ValueError(f'"{value}" не является временем')
+    return result
+
+
+def to_decimal(value: str) -> Decimal:
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f'"{value}" не является числом')
+
+
+def to_str(value: str) -> str:
+    return unquote(value)
+
+
+def get_coercer(field_type: str, lookup: str):
+    """
+        Возвращает функцию приведения значения GET параметра к типу поля.
+    """
+    if lookup == 'isnull':
+        return to_bool
+    if lookup in ('contains', 'icontains', 'startswith', 'istartswith'):
+        return to_str
+    if field_type in INTEGER_TYPES:
+        return int
+    if field_type == 'FloatField':
+        return float
+    if field_type == 'DecimalField':
+        return to_decimal
+    if field_type in ('BooleanField', 'NullBooleanField'):
+        return to_bool
+    if field_type == 'DateField':
+        return to_date
+    if field_type == 'DateTimeField':
+        return to_datetime
+    if field_type == 'TimeField':
+        return to_time
+    return to_str
+
+
+def is_indexed(model_class, model_field) -> bool:
+    """
+        Проверяет, что по полю есть индекс, с которого может начаться поиск.
+    """
+    if getattr(model_field, 'primary_key', False) or getattr(model_field, 'unique', False):
+        return True
+    if getattr(model_field, 'db_index', False) or model_field.many_to_many:
+        return True
+
+    meta = model_class._meta
+    for index in meta.indexes:
+        if index.fields and index.fields[0].lstrip('-') == model_field.name:
+            return True
+    for unique_together in meta.unique_together:
+        if unique_together and unique_together[0] == model_field.name:
+            return True
+
+    return False
+
+
+def warn_not_indexed(model_class, model_field):
+    key = (model_class._meta.label, model_field.name)
+    if key in _warned_not_indexed:
+        return
+
+    _warned_not_indexed.add(key)
+    logger.warning(
+        'Фильтр super-api по неиндексированной колонке %s.%s',
+        model_class._meta.label,
+        model_field.name,
+    )
+
+
+def compile_condition(model_class, fields_by_key: dict, param_key: str) -> tuple:
+    """
+        Разбирает ключ GET параметра в (orm_lookup, coercer, is_list, negate).
+    """
+    parts = param_key.split('__')
+    negate = False
+    lookup = 'exact'
+
+    if len(parts) > 1 and parts[-1] == NEGATION_SUFFIX:
+        negate = True
+        parts.pop()
+
+    if len(parts) > 1 and parts[-1] in FILTER_LOOKUPS:
+        lookup = parts.pop()
+
+    if len(parts) != 1:
+        raise FilterError(f'Недопустимый фильтр "{param_key}"')
+
+    field_key = parts[0]
+    if field_key not in fields_by_key:
+        raise FilterError(f'Фильтрация по полю "{field_key}" не разрешена')
+
+    slug, field_type = fields_by_key[field_key]
+    try:
+        model_field = model_class._meta.get_field(slug)
+    except FieldDoesNotExist:
+        raise FilterError(f'Поле "{field_key}" не является полем модели')
+
+    if not is_indexed(model_class, model_field):
+        warn_not_indexed(model_class, model_field)
+
+    orm_lookup = slug if lookup == 'exact' else f'{slug}__{lookup}'
+    return orm_lookup, get_coercer(field_type, lookup), lookup == 'in', negate
+
+
+@lru_cache(maxsize=FILTER_PLAN_CACHE_SIZE)
+def compile_filter_plan(model_label: str, fields_signature: tuple, shape: tuple) -> tuple:
+    """
+        Компилирует форму фильтра (набор ключей без значений) в план.
+        Кэшируется, поэтому повторные запросы с тем же набором ключей не разбираются заново.
+    """
+    model_class = apps.get_model(model_label)
+    fields_by_key = {}
+    for slug, alt_key, field_type in fields_signature:
+        fields_by_key[slug] = (slug, field_type)
+        if alt_key:
+            fields_by_key[alt_key] = (slug, field_type)
+
+    return tuple(
+        tuple(compile_condition(model_class, fields_by_key, param_key) for param_key in group)
+        for group in shape
+    )
+
+
+class FilterCompiler:
+    """
+        Преобразует GET параметры в дерево Q, разрешая фильтрацию только по полям сериализатора.
+
+        Первая группа плана объединяется через И, остальные (из параметров ?or=) - через ИЛИ внутри группы.
+    """
+
+    def __init__(self, model_class, serializer_fields: list):
+        self.model_class = model_class
+        self.fields_signature = tuple(
+            (serializer_field.slug, serializer_field.alt_key, serializer_field.type)
+            for serializer_field in serializer_fields
+        )
+
+    def get_shape(self, get_params: QueryDict) -> tuple:
+        """
+            Возвращает форму фильтра и значения, разложенные по той же форме.
+        """
+        and_keys, and_values = [], []
+        or_groups, or_values = [], []
+
+        for param_key, param_value in get_params.items():
+            if param_key != OR_PARAM:
+                and_keys.append(param_key)
+                and_values.append(param_value)
+                continue
+
+            for param_value in get_params.getlist(OR_PARAM):
+                group_keys, group_values = [], []
+                for condition in param_value.split(OR_SEPARATOR):
+                    if '=' not in condition:
+                        raise FilterError(f'Условие "{condition}" должно иметь вид поле=значение')
+                    condition_key, condition_value = condition.split('=', 1)
+                    group_keys.append(condition_key)
+                    group_values.append(condition_value)
+
+                or_groups.append(tuple(group_keys))
+                or_values.append(group_values)
+
+        shape = (tuple(and_keys), *or_groups)
+        values = [and_values, *or_values]
+        return shape, values
+
+    def compile(self, get_params: QueryDict) -> Q:
+        shape, values = self.get_shape(get_params)
+        plan = compile_filter_plan(self.model_class._meta.label, self.fields_signature, shape)
+
+        django_filter = Q()
+        for group_index, (group_plan, group_values) in enumerate(zip(plan, values)):
+            group_filter = Q()
+            for (orm_lookup, coercer, is_list, negate), raw_value in zip(group_plan, group_values):
+                condition = Q(**{orm_lookup: self.coerce(coercer, is_list, orm_lookup, raw_value)})
+                if negate:
+                    condition = ~condition
+
+                if group_index == 0:
+                    group_filter &= condition
+                else:
+                    group_filter |= condition
+
+            django_filter &= group_filter
+
+        return django_filter
+
+    def coerce(self, coercer, is_list: bool, orm_lookup: str, raw_value: str):
+        try:
+            if is_list:
+                return [coercer(item) for item in raw_value.split(LIST_SEPARATOR) if item != '']
+            return coercer(raw_value)
+        except (TypeError, ValueError) as error:
+            raise FilterError(f'Некорректное значение для "{orm_lookup}": {error}')
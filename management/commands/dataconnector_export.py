@@ -0,0 +1,119 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http.request import QueryDict
+
+from data_connector.encoders import dumps
+from data_connector.filters import FilterCompiler, FilterError
+from data_connector.models import DataConnector
+from data_connector.module_settings import SERIALIZE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает данные коннектора в файл JSON или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'connector',
+            help='id или slug коннектора',
+        )
+        parser.add_argument(
+            'path',
+            help='Файл выгрузки (для .gz сжатие включается автоматически)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['json', 'ndjson'],
+            default='ndjson',
+            help='json - один массив, ndjson - по объекту в строке',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файл gzip',
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            help='Фильтр в виде GET параметра super-api, например pages__gte=10 (можно несколько)',
+        )
+        parser.add_argument(
+            '--after-pk',
+            type=int,
+            default=None,
+            help='Продолжить выгрузку с объектов, у которых pk больше указанного. '
+                 'Данные дописываются в конец файла, поэтому доступно только для ndjson',
+        )
+        parser.add_argument(
+            '--database',
+            default=None,
+            help='Алиас БД для чтения (по умолчанию БД для чтения коннектора)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SERIALIZE_CHUNK_SIZE,
+            help='Сколько объектов сериализовать за раз',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов сериализуют диапазоны pk параллельно (1 - в текущем процессе)',
+        )
+
+    def handle(self, *args, **options):
+        data_connector = DataConnector.get_by_key(options['connector'])
+        if not data_connector or not data_connector.content_type:
+            raise CommandError(f'Коннектор "{options["connector"]}" не найден')
+
+        model_class = data_connector.content_type.model_class()
+        database = options['database'] or data_connector.get_read_database()
+        queryset = model_class.objects.db_manager(database).all()
+        if options['filter']:
+            get_params = QueryDict(mutable=True)
+            for condition in options['filter']:
+                key, _, value = condition.partition('=')
+                get_params.appendlist(key, value)
+
+            compiler = FilterCompiler(model_class, data_connector.get_active_serializer_fields())
+            try:
+                queryset = queryset.filter(compiler.compile(get_params))
+            except FilterError as error:
+                raise CommandError(str(error))
+
+        is_ndjson = options['format'] == 'ndjson'
+        # Массив json нельзя продолжить дописыванием, а перезапись уничтожила бы уже выгруженные данные
+        if not is_ndjson and options['after_pk'] is not None:
+            raise CommandError('--after-pk поддерживается только для --format ndjson')
+
+        is_gzip = options['gzip'] or options['path'].endswith('.gz')
+        mode = 'ab' if options['after_pk'] is not None else 'wb'
+        opener = gzip.open if is_gzip else open
+
+        total = queryset.count() if options['after_pk'] is None else queryset.filter(pk__gt=options['after_pk']).count()
+        written = 0
+        with opener(options['path'], mode) as file:
+            if not is_ndjson:
+                file.write(b'[')
+
+            for last_pk, chunk_data in data_connector.iter_serialized(
+                queryset,
+                chunk_size=options['chunk_size'],
+                after_pk=options['after_pk'],
+                workers=options['workers'],
+            ):
+                lines = [dumps(fields_data, decimal_as_str=True) for fields_data in chunk_data]
+                if is_ndjson:
+                    file.write(b'\n'.join(lines) + b'\n')
+                else:
+                    file.write((b',\n' if written else b'\n') + b',\n'.join(lines))
+
+                written += len(chunk_data)
+                self.stdout.write(f'Выгружено {written} из {total}, последний pk {last_pk}')
+
+            if not is_ndjson:
+                file.write(b'\n]\n')
+
+        self.stdout.write(self.style.SUCCESS(f'Готово: {written} объектов в {options["path"]}'))
@@ -0,0 +1,223 @@
+import re
+import gzip
+import json
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+
+from data_connector.encoders import loads
+from data_connector.module_settings import IMPORT_CHUNK_SIZE, PARALLEL_START_METHOD
+from data_connector.parallel import init_worker
+
+
+READ_BLOCK_SIZE = 1024 * 1024
+# Объект JSON массива больше этого размера считается ошибкой файла, а не оборванным на границе блока
+MAX_ITEM_SIZE = 64 * READ_BLOCK_SIZE
+# Сколько символов в конце буфера может занимать оборванное на границе блока число или литерал
+TRUNCATED_TOKEN_SIZE = 64
+
+WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_array(file):
+    """
+        Читает объекты из JSON массива по одному, не загружая весь файл в память.
+        Разобранная часть буфера отбрасывается только при чтении следующего блока,
+        испорченный объект вызывает ошибку сразу, а не после чтения файла до конца.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    index = 0
+    is_started = False
+    is_eof = False
+    while True:
+        index = WHITESPACE.match(buffer, index).end()
+        char = buffer[index:index + 1]
+        if not is_started and char:
+            if char != '[':
+                raise ValueError('Ожидается JSON массив')
+            index += 1
+            is_started = True
+            continue
+
+        if char == ',':
+            index += 1
+            continue
+        if char == ']':
+            return
+
+        if char:
+            try:
+                item, end = decoder.raw_decode(buffer, index)
+            except json.JSONDecodeError as error:
+                if is_eof or len(buffer) - index > MAX_ITEM_SIZE:
+                    raise
+                # Обрыв блока дает ошибку в самом конце буфера (строка - в месте своего начала),
+                # ошибка дальше от конца - испорченные данные, дочитывать файл незачем
+                if not error.msg.startswith('Unterminated string') and len(buffer) - error.pos > TRUNCATED_TOKEN_SIZE:
+                    raise
+            else:
+                # Объект мог оборваться на границе блока только если за ним ничего нет
+                if end < len(buffer) or is_eof:
+                    yield item
+                    index = end
+                    continue
+
+        if is_eof:
+            return
+
+        block = file.read(READ_BLOCK_SIZE)
+        if not block:
+            is_eof = True
+        buffer = buffer[index:] + block
+        index = 0
+
+
+def iter_ndjson(file):
+    for line in file:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+def iter_chunks(items, chunk_size: int):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def import_chunk(connector_id: int, chunk_index: int, start: int, chunk: list) -> dict:
+    """
+        Загружает одну пачку в отдельной транзакции и возвращает строку отчета.
+    """
+    report = {
+        'chunk': chunk_index,
+        'start': start,
+        'count': len(chunk),
+        'imported': 0,
+    }
+    # Модели импортируются в процессе пула после django.setup() (init_worker)
+    from data_connector.models import DataConnector
+
+    try:
+        data_connector = DataConnector.objects.get(id=connector_id)
+        imported, error_data = data_connector.import_data(chunk)
+        report['imported'] = imported
+        if error_data:
+            report['errors'] = {start + index: errors for index, errors in error_data.items()}
+    except Exception as error:
+        report['error'] = f'{error.__class__.__name__}: {error}'
+
+    return report
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку JSON или NDJSON через правила коннектора пачками в нескольких процессах'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'connector',
+            help='id или slug коннектора',
+        )
+        parser.add_argument(
+            'path',
+            help='Файл выгрузки (.gz читается со сжатием)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Сколько объектов загружать одной транзакцией',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов (1 - загружать в текущем процессе)',
+        )
+        parser.add_argument(
+            '--report',
+            default=None,
+            help='Файл отчета об ошибках по пачкам в формате NDJSON (по умолчанию <path>.errors.ndjson)',
+        )
+
+    def handle(self, *args, **options):
+        from data_connector.models import DataConnector
+
+        data_connector = DataConnector.get_by_key(options['connector'])
+        if not data_connector or not data_connector.content_type:
+            raise CommandError(f'Коннектор "{options["connector"]}" не найден')
+        if not data_connector.is_active or not data_connector.is_allow_create:
+            raise CommandError('Коннектор не разрешает создание объектов')
+        if not data_connector.is_method_allowed('POST'):
+            raise CommandError('Коннектор с upsert_key не разрешает редактирование объектов')
+
+        path = options['path']
+        report_path = options['report'] or f'{path}.errors.ndjson'
+        opener = gzip.open if path.endswith('.gz') else open
+
+        with opener(path, 'rt', encoding='utf-8') as file, open(report_path, 'w', encoding='utf-8') as report_file:
+            first_char = file.read(1)
+            while first_char and first_char.isspace():
+                first_char = file.read(1)
+            file.seek(0)
+            items = iter_json_array(file) if first_char == '[' else iter_ndjson(file)
+
+            totals = {'count': 0, 'imported': 0, 'failed_chunks': 0}
+            for report in self.run_chunks(data_connector.id, iter_chunks(items, options['chunk_size']), options['workers']):
+                totals['count'] += report['count']
+                totals['imported'] += report['imported']
+                if 'error' in report or 'errors' in report:
+                    totals['failed_chunks'] += 'error' in report
+                    report_file.write(json.dumps(report, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+                self.stdout.write(
+                    f'Пачка {report["chunk"]}: загружено {report["imported"]} из {report["count"]}'
+                    f'{", ошибка: " + report["error"] if "error" in report else ""}'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: загружено {totals["imported"]} из {totals["count"]}, '
+            f'пачек с ошибкой: {totals["failed_chunks"]}, отчет: {report_path}'
+        ))
+
+    def run_chunks(self, connector_id: int, chunks, workers: int):
+        """
+            Отдает отчеты по пачкам по мере готовности. В очереди держится не больше 2 пачек на процесс,
+            чтобы файл читался по мере загрузки, а не целиком.
+        """
+        start = 0
+        if workers <= 1:
+            for chunk_index, chunk in enumerate(chunks):
+                yield import_chunk(connector_id, chunk_index, start, chunk)
+                start += len(chunk)
+            return
+
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+        pending = set()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(PARALLEL_START_METHOD),
+            initializer=init_worker,
+        ) as executor:
+            for chunk_index, chunk in enumerate(chunks):
+                pending.add(executor.submit(import_chunk, connector_id, chunk_index, start, chunk))
+                start += len(chunk)
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+
+            for future in pending:
+                yield future.result()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from data_connector.module_settings import OUTBOX_BATCH_SIZE
+from data_connector.outbox import run_drainer
+
+
+class Command(BaseCommand):
+    help = 'Отправляет очередь изменений (OutboxEvent) передатчикам с включенной передачей изменений'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Сколько событий отправлять за один проход',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1,
+            help='Как часто проверять очередь, когда она пуста (сек)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить накопившуюся очередь и выйти',
+        )
+
+    def handle(self, *args, **options):
+        run_drainer(
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            stdout=self.stdout,
+        )
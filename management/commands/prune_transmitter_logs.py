@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from data_connector.models import TransmitterLog
+from data_connector.module_settings import (
+    TRANSMITTER_LOG_MAX_AGE_DAYS,
+    TRANSMITTER_LOG_MAX_COUNT,
+    TRANSMITTER_LOG_RESULT_MAX_LENGTH,
+)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет старые логи передатчиков и обрезает большие результаты'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age-days',
+            type=int,
+            default=TRANSMITTER_LOG_MAX_AGE_DAYS,
+            help='Удалить логи старше указанного количества дней (0 - не ограничивать)',
+        )
+        parser.add_argument(
+            '--max-count',
+            type=int,
+            default=TRANSMITTER_LOG_MAX_COUNT,
+            help='Оставить указанное количество последних логов для каждого передатчика (0 - не ограничивать)',
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Обрезать результаты оставшихся логов',
+        )
+        parser.add_argument(
+            '--max-result-length',
+            type=int,
+            default=TRANSMITTER_LOG_RESULT_MAX_LENGTH,
+            help='Максимальная длина результата при --compact',
+        )
+
+    def handle(self, *args, **options):
+        deleted_count = TransmitterLog.prune(
+            max_age_days=options['max_age_days'],
+            max_count=options['max_count'],
+        )
+        self.stdout.write(f'Удалено логов: {deleted_count}')
+
+        if options['compact']:
+            compacted_count = TransmitterLog.compact(options['max_result_length'])
+            self.stdout.write(f'Обрезано логов: {compacted_count}')
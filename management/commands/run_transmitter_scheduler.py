@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from data_connector.scheduler import run_scheduler
+
+
+class Command(BaseCommand):
+    help = 'Запускает передатчики по расписанию (один долгоживущий процесс)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval',
+            type=int,
+            default=10,
+            help='Как часто проверять расписание (сек)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Сколько передатчиков может выполняться одновременно',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Проверить расписание один раз и выйти',
+        )
+
+    def handle(self, *args, **options):
+        run_scheduler(
+            poll_interval=options['poll_interval'],
+            workers=options['workers'],
+            once=options['once'],
+            stdout=self.stdout,
+        )
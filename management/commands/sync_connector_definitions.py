@@ -0,0 +1,83 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from data_connector.definitions import DefinitionError, apply_definitions, get_changed_slugs, get_fingerprints, dump_definitions
+from data_connector.models import RemoteSite
+from data_connector.throttling import RemoteSiteLimitTimeout
+
+
+DEFINITIONS_PATH = 'super-api/definitions/'
+
+
+class Command(BaseCommand):
+    help = 'Синхронизирует описания коннекторов с удаленным сайтом: передаются только коннекторы с другим отпечатком'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'remote_site',
+            help='id или домен удаленного сайта',
+        )
+        direction = parser.add_mutually_exclusive_group(required=True)
+        direction.add_argument(
+            '--push',
+            action='store_true',
+            help='Отправить описания этого сайта на удаленный',
+        )
+        direction.add_argument(
+            '--pull',
+            action='store_true',
+            help='Загрузить описания с удаленного сайта',
+        )
+        parser.add_argument(
+            '--connector',
+            action='append',
+            default=None,
+            help='slug коннектора (можно несколько, по умолчанию все)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие коннекторы отличаются',
+        )
+
+    def handle(self, *args, **options):
+        key = options['remote_site']
+        remote_site = RemoteSite.objects.filter(id=int(key)).first() if key.isdigit() else RemoteSite.objects.filter(domain=key).first()
+        if not remote_site:
+            raise CommandError(f'Удаленный сайт "{key}" не найден')
+
+        slugs = options['connector']
+        try:
+            remote_fingerprints = self.request(remote_site, 'GET')['fingerprints']
+            local_fingerprints = get_fingerprints(slugs)
+            if slugs:
+                remote_fingerprints = {slug: value for slug, value in remote_fingerprints.items() if slug in slugs}
+
+            if options['push']:
+                changed_slugs = get_changed_slugs(local_fingerprints, remote_fingerprints)
+                self.stdout.write(f'Отличаются: {", ".join(changed_slugs) or "нет"}')
+                if changed_slugs:
+                    result = self.request(remote_site, 'POST', data={
+                        'definitions': list(dump_definitions(changed_slugs).values()),
+                        'dry_run': options['dry_run'],
+                    })
+                    self.write_result(result)
+
+            else:
+                changed_slugs = get_changed_slugs(remote_fingerprints, local_fingerprints)
+                self.stdout.write(f'Отличаются: {", ".join(changed_slugs) or "нет"}')
+                if changed_slugs:
+                    definitions = self.request(remote_site, 'GET', params={'connector': ','.join(changed_slugs)})['definitions']
+                    self.write_result(apply_definitions(definitions, dry_run=options['dry_run']))
+
+        except (DefinitionError, RemoteSiteLimitTimeout) as error:
+            raise CommandError(str(error))
+
+    def request(self, remote_site: RemoteSite, method: str, data=None, params=None) -> dict:
+        response = remote_site.send(method, DEFINITIONS_PATH, data=data, params=params)
+        if response.status_code != 200:
+            raise CommandError(f'{remote_site.domain} ответил {response.status_code}: {response.text[:500]}')
+        return response.json()
+
+    def write_result(self, result: dict):
+        for key in ('created', 'updated', 'unchanged'):
+            self.stdout.write(f'{key}: {", ".join(result.get(key) or []) or "-"}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from data_connector.models import DataConnector
+
+
+class Command(BaseCommand):
+    help = 'Добавляет поля сериализаторов для новых полей моделей (с --remove удаляет поля, которых больше нет в моделях)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'connectors',
+            nargs='*',
+            help='id или slug коннекторов (по умолчанию все)',
+        )
+        parser.add_argument(
+            '--remove',
+            action='store_true',
+            help='Удалить поля, которых нет в модели (в том числе вычисляемые и добавленные вручную)',
+        )
+
+    def handle(self, *args, **options):
+        if options['connectors']:
+            data_connectors = []
+            for key in options['connectors']:
+                data_connector = DataConnector.get_by_key(key)
+                if not data_connector:
+                    raise CommandError(f'Коннектор "{key}" не найден')
+                data_connectors.append(data_connector)
+        else:
+            data_connectors = DataConnector.objects.filter(content_type__isnull=False).select_related('content_type')
+
+        for data_connector in data_connectors:
+            created_count, removed_count = data_connector.sync_serializer_fields(remove=options['remove'])
+            if created_count or removed_count:
+                self.stdout.write(f'{data_connector.slug or data_connector.id}: добавлено {created_count}, удалено {removed_count}')
+
+        self.stdout.write(self.style.SUCCESS('Готово'))
@@ -0,0 +1,213 @@
+import time
+import hashlib
+
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.http.request import QueryDict
+from django.contrib.contenttypes.models import ContentType
+
+from rest_framework.settings import api_settings
+
+from .models import (
+    DataConnector,
+    IdempotencyKey,
+)
+from .filters import FilterCompiler
+from .module_settings import READ_YOUR_WRITES_SECONDS, REPLICATION_HEADER, REPLICATION_USERNAMES, IDEMPOTENCY_HEADER
+from .serialization import materialize
+
+
+# Ключ сессии со временем последней записи через super-api
+LAST_WRITE_SESSION_KEY = 'data_connector_last_write'
+
+
+class IdempotencyConflict(Exception):
+    """
+        Ключ идемпотентности нельзя использовать для этого запроса сейчас.
+    """
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SuperApiMixin:
+    """
+        Общая часть синхронного и асинхронного super-api: поиск модели, queryset и фильтры.
+    """
+    # GET параметры, которые управляют ответом и не участвуют в фильтрации
+    reserved_get_params = [
+        api_settings.URL_FORMAT_OVERRIDE,
+        'include',
+    ]
+
+    def get_some_model(self, natural_key, obj_id=None):
+        try:
+            content_type = ContentType.objects.get_by_natural_key(*natural_key.split('__'))
+            some_model = content_type.model_class()
+            print('type some_model', type(some_model))
+            print('get_some_model some_model', some_model)
+            print('get_some_model some_model.__class__.__name__', some_model.__name__)
+        except:
+            some_model = None
+
+
+        return some_model
+    
+    def get_data_connector(
+        self,
+        some_model,
+        method: str = 'GET',
+        serializer_name: Optional[str] = None,
+        serializer_self_assembly_data: Optional[dict] = None,
+    ) -> Optional[DataConnector]:
+        '''
+            Возвращает DataConnector модели. Найденные коннекторы запоминаются на время запроса,
+            поэтому пакетный запрос не ищет один и тот же коннектор повторно.
+        '''
+        if serializer_self_assembly_data:
+            return DataConnector.get_serializer(some_model, method, serializer_name, serializer_self_assembly_data)
+
+        if not hasattr(self, '_data_connectors'):
+            self._data_connectors = {}
+
+        # Метод входит в ключ: для GET может вернуться автоматический коннектор только для чтения
+        key = (some_model, method, serializer_name)
+        if key not in self._data_connectors:
+            self._data_connectors[key] = DataConnector.get_serializer(
+                some_model,
+                method,
+                serializer_name,
+            )
+
+        return self._data_connectors[key]
+
+    def get_object(self, some_model, obj_id=None):
+        if not obj_id:
+            return None
+        
+        return some_model.objects.filter(id=obj_id).first()
+    
+    def get_queryset(self, some_model, obj_id=None, get_params={}, serializer: Optional[DataConnector] = None):
+        print('SuperApiMixin get_queryset')
+        print('get_params', get_params)
+        manager = some_model.objects.db_manager(self.get_read_database(serializer))
+        if obj_id:
+            return manager.filter(id=obj_id)
+        elif get_params:
+            get_params = get_params.copy()
+            for reserved_get_param in self.reserved_get_params:
+                get_params.pop(reserved_get_param, None)
+
+            return manager.filter(self.get_django_filter(get_params, some_model, serializer))
+        else:
+            return manager.all()
+
+    def get_session(self):
+        request = getattr(self, 'request', None)
+        return getattr(request, 'session', None)
+
+    def is_recent_write(self) -> bool:
+        '''
+            Была ли запись в этом запросе (например раньше в пакетном запросе) или недавно в этой сессии.
+        '''
+        if getattr(self, '_has_written', False):
+            return True
+
+        session = self.get_session()
+        if session is None:
+            return False
+
+        last_write = session.get(LAST_WRITE_SESSION_KEY)
+        return bool(last_write) and time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+    def is_replication_request(self) -> bool:
+        '''
+            Запрос отправлен передатчиком другого сайта (RemoteSite.send). Полученные изменения
+            не записываются в очередь OutboxEvent, чтобы не вернуть их обратно отправителю.
+            Заголовка недостаточно: запрос должен быть выполнен от имени пользователя из REPLICATION_USERNAMES.
+        '''
+        request = getattr(self, 'request', None)
+        if request is None or not request.headers.get(REPLICATION_HEADER):
+            return False
+
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_authenticated and user.get_username() in REPLICATION_USERNAMES)
+
+    def claim_idempotency_key(self, request, method: str) -> tuple:
+        '''
+            Возвращает (запись IdempotencyKey, сохраненный ответ (данные, статус)).
+            Без заголовка Idempotency-Key - (None, None). Если ответ уже сохранен, запись не возвращается:
+            запрос не выполняется повторно. Тело должно читаться до разбора request.data.
+        '''
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return None, None
+
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            raise IdempotencyConflict(f'Слишком длинный {IDEMPOTENCY_HEADER}', 400)
+
+        request_hash = hashlib.sha256(f'{method} {request.path}\n'.encode('utf-8') + request.body).hexdigest()
+        user = getattr(request, 'user', None)
+        user_id = user.pk if user is not None and user.is_authenticated else None
+        record, is_claimed = IdempotencyKey.claim(user_id, key, request_hash)
+        if is_claimed:
+            return record, None
+
+        if record.request_hash != request_hash:
+            raise IdempotencyConflict(f'{IDEMPOTENCY_HEADER} уже использован для другого запроса', 422)
+        if record.status is None:
+            raise IdempotencyConflict(f'Запрос с этим {IDEMPOTENCY_HEADER} еще выполняется', 409)
+
+        return None, (record.get_response(), record.status)
+
+    def run_idempotent(self, record: Optional[IdempotencyKey], get_result) -> tuple:
+        '''
+            Выполняет get_result() -> (данные, статус) и сохраняет ответ для повторов с тем же ключом.
+            Запись и сохранение ответа идут одной транзакцией: без сохраненного ответа не остается
+            выполненной записи, которую повтор выполнил бы второй раз.
+        '''
+        if record is None:
+            return get_result()
+
+        try:
+            with transaction.atomic():
+                response_data, response_status = get_result()
+                response_data = materialize(response_data)
+                record.save_response(response_data, response_status)
+        except BaseException:
+            record.delete()
+            raise
+
+        return response_data, response_status
+
+    def mark_write(self):
+        self._has_written = True
+        session = self.get_session()
+        if session is not None:
+            session[LAST_WRITE_SESSION_KEY] = time.time()
+
+    def get_read_database(self, serializer: Optional[DataConnector] = None) -> Optional[str]:
+        '''
+            БД для чтения коннектора. После записи клиент читает из основной БД, чтобы видеть свои изменения.
+        '''
+        if not serializer:
+            return None
+
+        database = serializer.get_read_database()
+        if not database or self.is_recent_write():
+            return None
+
+        return database
+        
+    def get_django_filter(self, get_params: QueryDict, some_model, serializer: DataConnector) -> Q:
+        '''
+            Возвращает Q фильтр по переданым get_params.
+            Фильтровать можно только по полям сериализатора, значения приводятся к типу поля.
+        '''
+        filter_compiler = FilterCompiler(some_model, serializer.get_active_serializer_fields())
+        django_filter = filter_compiler.compile(get_params)
+        print('django_filter', django_filter)
+        return django_filter
@@ -9,3 +9,127 @@ URL_TO_DEFAULT_FILES = '/static/data_connector/files/'
 
 
 
+
+# Размер пачки строк при потоковом чтении queryset через iterator()
+SERIALIZE_CHUNK_SIZE = 2000
+
+# Сколько скомпилированных форм фильтров super-api держать в памяти
+FILTER_PLAN_CACHE_SIZE = 256
+
+# Глубина вложенной сериализации по умолчанию и ее верхняя граница для любых полей
+SERIALIZE_MAX_DEPTH = 5
+
+# Максимум операций в одном пакетном запросе super-api/batch/
+BATCH_MAX_OPERATIONS = 50
+
+# Размер пачки для bulk_create()/bulk_update()
+BULK_BATCH_SIZE = 500
+
+# Хранение логов передатчиков (команда prune_transmitter_logs)
+TRANSMITTER_LOG_MAX_AGE_DAYS = 30
+TRANSMITTER_LOG_MAX_COUNT = 200
+# Результат длиннее этого количества символов сохраняется в обрезанном виде
+TRANSMITTER_LOG_RESULT_MAX_LENGTH = 10000
+# Сколько последних логов показывать на странице передатчика в админке
+TRANSMITTER_LOG_INLINE_LIMIT = 20
+
+# Через сколько секунд блокировка выполняющегося передатчика считается зависшей
+TRANSMITTER_RUN_TIMEOUT = 60 * 60
+
+# Ограничения запросов к удаленным сайтам: сколько секунд ждать свободного слота/токенов,
+# как часто проверять освободившийся слот и через сколько секунд занятый слот запроса считается зависшим
+REMOTE_SITE_LIMIT_TIMEOUT = 5 * 60
+REMOTE_SITE_LIMIT_POLL_INTERVAL = 0.5
+REMOTE_SITE_LIMIT_STALE_SECONDS = 10 * 60
+
+# Размер пачки объектов, которая загружается одной транзакцией командой dataconnector_import
+IMPORT_CHUNK_SIZE = 5000
+
+# Сколько объектов передатчик отправляет в одном запросе
+TRANSMITTER_BATCH_SIZE = 1000
+
+# Сколько коннекторов, собранных из serializer_self_assembly_data, держать в памяти
+SELF_ASSEMBLY_CACHE_SIZE = 128
+# Как часто (сек) перечитывать активные поля коннектора, на основе которого идет самосборка.
+# В этом процессе изменения полей применяются сразу, в остальных - не позже чем через это время
+SELF_ASSEMBLY_CACHE_TTL = 60
+
+# Автоматические сериализаторы: модели без DataConnector отдаются на чтение (GET) по плану из _meta
+# (простые колонки и id связей ForeignKey). Включается в local_settings.py: AUTO_SERIALIZERS = True
+try:
+    from .local_settings import AUTO_SERIALIZERS
+except:
+    AUTO_SERIALIZERS = False
+# Приложения, модели которых никогда не отдаются автоматически
+AUTO_SERIALIZER_EXCLUDED_APPS = (
+    'admin',
+    'auth',
+    'authtoken',
+    'contenttypes',
+    'sessions',
+    'data_connector',
+)
+# Поля, которые не отдаются автоматическими сериализаторами ни в одной модели.
+# Модель settings.AUTH_USER_MODEL не отдается автоматически, даже если ее приложение не исключено
+AUTO_SERIALIZER_EXCLUDED_FIELDS = (
+    'password',
+)
+# Как часто (сек) перечитывать список моделей, для которых настроены DataConnector
+AUTO_SERIALIZER_LOOKUP_TTL = 60
+
+# Алиас БД (из settings.DATABASES) для чтения super-api и выгрузок передатчиков, например реплики.
+# Переопределяется в DataConnector.read_database. Задается в local_settings.py: READ_DATABASE = 'replica'
+try:
+    from .local_settings import READ_DATABASE
+except:
+    READ_DATABASE = ''
+# Сколько секунд после записи (POST/PATCH) в той же сессии чтение идет из основной БД,
+# чтобы клиент видел свои изменения несмотря на отставание реплики
+READ_YOUR_WRITES_SECONDS = 10
+
+# Очередь изменений (OutboxEvent) для передатчиков с is_push.
+# Сколько событий команда drain_outbox отправляет за один проход
+OUTBOX_BATCH_SIZE = 500
+# Как часто (сек) перечитывать список моделей, изменения которых нужно записывать в очередь
+OUTBOX_PUSH_MODELS_TTL = 60
+# Приложения, изменения моделей которых никогда не записываются в очередь
+OUTBOX_EXCLUDED_APPS = (
+    'migrations',
+    'contenttypes',
+    'sessions',
+    'data_connector',
+)
+# Заголовок запросов RemoteSite.send. Изменения из таких запросов не записываются в очередь,
+# если запрос выполнен от имени пользователя из REPLICATION_USERNAMES
+REPLICATION_HEADER = 'X-Data-Connector-Replication'
+# Пользователи (username), от имени которых другие сайты передают изменения.
+# Задается в local_settings.py: REPLICATION_USERNAMES = ('replication',)
+try:
+    from .local_settings import REPLICATION_USERNAMES
+except:
+    REPLICATION_USERNAMES = ()
+
+# Idempotency-Key для POST/PATCH/DELETE super-api: ответ на первый запрос хранится указанное время (сек),
+# повтор с тем же ключом получает сохраненный ответ без повторной записи
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_TTL = 24 * 60 * 60
+# Запрос с ключом, не завершившийся за это время (сек), считается упавшим и может быть выполнен повторно
+IDEMPOTENCY_LOCK_SECONDS = 5 * 60
+# Как часто (сек) удалять просроченные ключи
+IDEMPOTENCY_PRUNE_INTERVAL = 10 * 60
+
+# Таймаут запроса к удаленному сайту (сек) и сколько раз повторить запрос при таймауте или ошибке соединения.
+# Повтор отправляется с тем же Idempotency-Key, поэтому получатель не выполнит запись дважды
+REMOTE_SITE_REQUEST_TIMEOUT = 60
+REMOTE_SITE_RETRIES = 2
+# Пауза перед первым повтором (сек), перед каждым следующим она удваивается.
+# Повторяется и ответ 409: получатель еще выполняет первый запрос с этим ключом
+REMOTE_SITE_RETRY_BACKOFF = 1
+
+# Способ запуска процессов параллельной сериализации (iter_serialized_parallel).
+# spawn безопасен при запуске из потоков (планировщик, веб-сервер), fork быстрее стартует из команд
+try:
+    from .local_settings import PARALLEL_START_METHOD
+except:
+    PARALLEL_START_METHOD = 'spawn'
@@ -0,0 +1,261 @@
+import time
+import threading
+
+from contextlib import contextmanager
+from typing import Optional
+from contextvars import ContextVar
+
+from django.db import connections, close_old_connections, DEFAULT_DB_ALIAS
+from django.db.models import F, Q
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+
+from .module_settings import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_PUSH_MODELS_TTL,
+    OUTBOX_EXCLUDED_APPS,
+)
+
+
+# Класс модели -> (id ContentType, attname полей ключа сопоставления) для моделей,
+# изменения которых передаются (Transmitter.is_push)
+_push_models = {}
+_push_models_loaded = 0
+_push_models_lock = threading.Lock()
+_is_table_ready = False
+
+_is_suppressed = ContextVar('data_connector_outbox_suppressed', default=False)
+
+
+def clear_push_models():
+    global _push_models_loaded
+    _push_models_loaded = 0
+
+
+def get_push_models() -> dict:
+    """
+        Модели, привязанные к передатчикам с is_push. Список перечитывается раз в OUTBOX_PUSH_MODELS_TTL секунд
+        (в текущем процессе сразу после изменения передатчика), поэтому сохранение остальных моделей
+        стоит одной проверки в словаре.
+    """
+    global _push_models, _push_models_loaded
+
+    if time.monotonic() - _push_models_loaded < OUTBOX_PUSH_MODELS_TTL:
+        return _push_models
+
+    from django.contrib.contenttypes.models import ContentType
+    from .models import Transmitter
+
+    with _push_models_lock:
+        if time.monotonic() - _push_models_loaded >= OUTBOX_PUSH_MODELS_TTL:
+            global _is_table_ready
+            # Модели сохраняются и в миграциях, когда таблицы передатчиков еще может не быть
+            if not _is_table_ready:
+                _is_table_ready = Transmitter._meta.db_table in connections[DEFAULT_DB_ALIAS].introspection.table_names()
+                if not _is_table_ready:
+                    return _push_models
+
+            push_models = {}
+            for transmitter in Transmitter.objects.filter(
+                is_push=True,
+                action='send',
+                serializer__content_type__isnull=False,
+                remote_site__isnull=False,
+            ).select_related('serializer'):
+                content_type_id = transmitter.serializer.content_type_id
+                model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+                if not model_class:
+                    continue
+
+                try:
+                    key_fields = transmitter.serializer.get_upsert_fields()
+                except FieldDoesNotExist:
+                    key_fields = []
+                _, model_key_fields = push_models.get(model_class, (content_type_id, ()))
+                push_models[model_class] = (content_type_id, tuple(dict.fromkeys([*model_key_fields, *key_fields])))
+
+            _push_models = push_models
+            _push_models_loaded = time.monotonic()
+
+    return _push_models
+
+
+@contextmanager
+def suppress_outbox(is_suppressed: bool = True):
+    """
+        Изменения внутри блока не записываются в очередь. Используется при приеме данных от другого сайта.
+    """
+    token = _is_suppressed.set(is_suppressed or _is_suppressed.get())
+    try:
+        yield
+    finally:
+        _is_suppressed.reset(token)
+
+
+def save_events(events: list, using: str):
+    """
+        Записывает события в той же БД (и транзакции), что и сами изменения.
+        На объект хранится одно событие: повторное изменение заменяет операцию, ключ и время.
+    """
+    from .models import OutboxEvent
+
+    if not events:
+        return
+
+    if connections[using].features.supports_update_conflicts_with_target:
+        OutboxEvent.objects.using(using).bulk_create(
+            events,
+            batch_size=OUTBOX_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['op', 'key', 'changed'],
+        )
+    else:
+        for event in events:
+            OutboxEvent.objects.using(using).update_or_create(
+                content_type_id=event.content_type_id,
+                object_id=event.object_id,
+                defaults={'op': event.op, 'key': event.key, 'changed': event.changed},
+            )
+
+
+def save_event(content_type_id: int, object_id: str, op: str, key: Optional[dict], using: str):
+    from .models import OutboxEvent
+
+    save_events(
+        [OutboxEvent(content_type_id=content_type_id, object_id=object_id, op=op, key=key, changed=timezone.now())],
+        using,
+    )
+
+
+def get_push_model(model_class) -> Optional[tuple]:
+    if model_class._meta.app_label in OUTBOX_EXCLUDED_APPS or _is_suppressed.get():
+        return None
+
+    return get_push_models().get(model_class)
+
+
+def is_push_model(model_class) -> bool:
+    return get_push_model(model_class) is not None
+
+
+def record_change(instance, using: str):
+    push_model = get_push_model(instance.__class__)
+    if push_model:
+        save_event(push_model[0], str(instance.pk), 'upsert', None, using)
+
+
+def record_bulk_change(model_class, pks, using: str):
+    """
+        bulk_create() и bulk_update() не отправляют post_save, поэтому массовые записи
+        (bulk_update_data, upsert_objects, import_data) ставят изменения в очередь сами, одним запросом.
+    """
+    from .models import OutboxEvent
+
+    push_model = get_push_model(model_class)
+    if not push_model:
+        return
+
+    changed = timezone.now()
+    save_events(
+        [
+            OutboxEvent(content_type_id=push_model[0], object_id=str(pk), op='upsert', key=None, changed=changed)
+            for pk in dict.fromkeys(pks)
+            if pk is not None
+        ],
+        using,
+    )
+
+
+def record_delete(instance, using: str):
+    """
+        Tombstone удаленного объекта: id и поля ключа сопоставления, чтобы получатель нашел объект
+        и без совпадения id.
+    """
+    push_model = get_push_model(instance.__class__)
+    if not push_model:
+        return
+
+    content_type_id, key_fields = push_model
+    key = {instance._meta.pk.attname: instance.pk}
+    for attname in key_fields:
+        key[attname] = getattr(instance, attname)
+    save_event(content_type_id, str(instance.pk), 'delete', key, using)
+
+
+def drain(batch_size: int = OUTBOX_BATCH_SIZE) -> tuple:
+    """
+        Отправляет одну пачку самых старых событий (изменения и удаления) всем передатчикам с is_push их модели.
+        Возвращает (отправлено, с ошибкой).
+
+        Событие удаляется, только если оно не изменилось за время отправки: объект, сохраненный
+        во время отправки, останется в очереди и уйдет следующей пачкой.
+        Если хотя бы один передатчик не смог отправить изменения, событие остается в очереди
+        и будет отправлено всем передатчикам повторно (прием на стороне получателя идет по upsert_key).
+    """
+    from .models import Transmitter, OutboxEvent
+
+    # События с ошибками отправки уходят в конец очереди и не блокируют остальные
+    events = list(OutboxEvent.objects.order_by('attempts', 'changed', 'id')[:batch_size])
+    if not events:
+        return 0, 0
+
+    events_by_content_type = {}
+    for event in events:
+        events_by_content_type.setdefault(event.content_type_id, []).append(event)
+
+    transmitters_by_content_type = {}
+    for transmitter in Transmitter.objects.filter(
+        is_push=True,
+        action='send',
+        remote_site__isnull=False,
+        serializer__content_type_id__in=events_by_content_type,
+    ).select_related('serializer', 'serializer__content_type', 'remote_site'):
+        transmitters_by_content_type.setdefault(transmitter.serializer.content_type_id, []).append(transmitter)
+
+    sent_count = 0
+    failed_count = 0
+    for content_type_id, content_type_events in events_by_content_type.items():
+        object_ids = [event.object_id for event in content_type_events if event.op == 'upsert']
+        tombstones = [event.key or {'id': event.object_id} for event in content_type_events if event.op == 'delete']
+        errors = []
+        for transmitter in transmitters_by_content_type.get(content_type_id, []):
+            error = transmitter.push(object_ids, tombstones)
+            if error:
+                errors.append(f'{transmitter}: {error}')
+
+        if errors:
+            failed_count += len(content_type_events)
+            OutboxEvent.objects.filter(id__in=[event.id for event in content_type_events]).update(
+                attempts=F('attempts') + 1,
+                last_error='\n'.join(errors)[:10000],
+            )
+            continue
+
+        # Без передатчиков (is_push выключен) события просто удаляются
+        sent_count += len(content_type_events)
+        sent_filter = Q()
+        for event in content_type_events:
+            sent_filter |= Q(id=event.id, changed=event.changed)
+        OutboxEvent.objects.filter(sent_filter).delete()
+
+    return sent_count, failed_count
+
+
+def run_drainer(batch_size: int = OUTBOX_BATCH_SIZE, poll_interval: float = 1, once: bool = False, stdout=None):
+    """
+        Цикл отправки очереди: пачки отправляются подряд, пока очередь не опустеет,
+        затем очередь проверяется раз в poll_interval секунд.
+    """
+    while True:
+        sent_count, failed_count = drain(batch_size)
+        if stdout and (sent_count or failed_count):
+            stdout.write(f'{timezone.now().isoformat()} отправлено событий: {sent_count}, с ошибкой: {failed_count}')
+
+        close_old_connections()
+        is_full = sent_count + failed_count >= batch_size
+        if once and not is_full:
+            break
+        # После ошибок не отправлять повторно без паузы
+        if not is_full or failed_count:
+            time.sleep(poll_interval)
@@ -0,0 +1,80 @@
+import multiprocessing
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+from django.db import connections
+
+from .module_settings import SERIALIZE_CHUNK_SIZE, PARALLEL_START_METHOD
+
+
+def init_worker():
+    """
+        Инициализация процесса пула: при запуске через spawn Django в нем еще не настроен.
+    """
+    django.setup()
+
+
+def serialize_range(connector_id: int, queryset, start_pk, end_pk) -> list:
+    """
+        Сериализует объекты queryset с start_pk < pk <= end_pk в процессе пула.
+        Queryset передается без результатов (pickle хранит только запрос и алиас БД),
+        у процесса свое соединение с БД.
+    """
+    from .models import DataConnector
+    from .serialization import SerializationContext, materialize
+
+    data_connector = DataConnector.objects.get(id=connector_id)
+    page = queryset.filter(pk__lte=end_pk)
+    if start_pk is not None:
+        page = page.filter(pk__gt=start_pk)
+    return materialize(data_connector.serialize(page, SerializationContext()))
+
+
+def iter_pk_ranges(queryset, chunk_size: int, after_pk=None):
+    """
+        Делит queryset на диапазоны pk по chunk_size объектов: (pk до диапазона, последний pk диапазона).
+        Читается только колонка pk по индексу, без сериализации.
+    """
+    while True:
+        page = queryset if after_pk is None else queryset.filter(pk__gt=after_pk)
+        page_pks = list(page.values_list('pk', flat=True)[:chunk_size])
+        if not page_pks:
+            return
+
+        yield after_pk, page_pks[-1]
+        after_pk = page_pks[-1]
+
+
+def iter_serialized_parallel(data_connector, queryset, workers: int, chunk_size: int = SERIALIZE_CHUNK_SIZE, after_pk=None):
+    """
+        Как DataConnector.iter_serialized(), но диапазоны pk сериализуются в пуле из workers процессов.
+        Пачки отдаются строго по возрастанию pk, в очереди не больше 2 диапазонов на процесс,
+        поэтому память родителя не зависит от размера выгрузки.
+    """
+    queryset = queryset.order_by('pk')
+    if PARALLEL_START_METHOD == 'fork':
+        # Соединения с БД не должны наследоваться дочерними процессами
+        connections.close_all()
+    pending = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(PARALLEL_START_METHOD),
+        initializer=init_worker,
+    ) as executor:
+        try:
+            for start_pk, end_pk in iter_pk_ranges(queryset, chunk_size, after_pk):
+                pending.append((end_pk, executor.submit(serialize_range, data_connector.id, queryset, start_pk, end_pk)))
+                if len(pending) >= workers * 2:
+                    end_pk, future = pending.popleft()
+                    yield end_pk, future.result()
+
+            while pending:
+                end_pk, future = pending.popleft()
+                yield end_pk, future.result()
+        finally:
+            # Генератор закрыт раньше времени: не ждать сериализации ненужных диапазонов
+            for end_pk, future in pending:
+                future.cancel()
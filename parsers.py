@@ -0,0 +1,16 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .encoders import loads
+
+
+class FastJSONParser(JSONParser):
+    """
+        JSON парсер super-api на encoders.loads() (orjson, если установлен).
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return loads(stream.read())
+        except ValueError as error:
+            raise ParseError(f'JSON parse error - {error}')
@@ -0,0 +1,27 @@
+from rest_framework.renderers import JSONRenderer
+
+from .encoders import dumps
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+        JSON рендерер super-api на encoders.dumps() (orjson, если установлен).
+        Ответ с отступами (?indent / Accept: application/json; indent=4) рендерится стандартным JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return dumps(data)
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+        Рендерер для ?format=columnar.
+        Данные уже собраны в колоночном виде в SuperApiView, здесь меняется только формат для согласования.
+    """
+    format = 'columnar'
@@ -0,0 +1,184 @@
+import time
+
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .module_settings import TRANSMITTER_RUN_TIMEOUT
+
+
+class CronError(ValueError):
+    """
+        Ошибка в выражении cron.
+    """
+
+
+class CronSchedule:
+    """
+        Расписание в формате cron из 5 полей: минута, час, день месяца, месяц, день недели.
+        Поддерживаются *, числа, диапазоны a-b, шаг */n и a-b/n, списки через запятую.
+        День недели: 0-6, где 0 (и 7) - воскресенье.
+    """
+    FIELD_RANGES = (
+        (0, 59),
+        (0, 23),
+        (1, 31),
+        (1, 12),
+        (0, 7),
+    )
+    # Не искать следующий запуск дальше этого количества дней (например для 31 февраля)
+    MAX_SEARCH_DAYS = 366 * 5
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        parts = expression.split()
+        if len(parts) != 5:
+            raise CronError(f'Выражение cron "{expression}" должно состоять из 5 полей')
+
+        try:
+            values = [
+                self.parse_field(part, minimum, maximum)
+                for part, (minimum, maximum) in zip(parts, self.FIELD_RANGES)
+            ]
+        except CronError:
+            raise
+        except ValueError:
+            raise CronError(f'Некорректное выражение cron "{expression}"')
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        # В cron воскресенье может быть и 0, и 7, в Python это 6
+        self.weekdays = {(weekday - 1) % 7 for weekday in weekdays}
+        self.is_days_restricted = parts[2] != '*'
+        self.is_weekdays_restricted = parts[4] != '*'
+
+    @staticmethod
+    def parse_field(part: str, minimum: int, maximum: int) -> set:
+        values = set()
+        for item in part.split(','):
+            step = 1
+            if '/' in item:
+                item, step = item.split('/', 1)
+                step = int(step)
+                if step < 1:
+                    raise CronError(f'Некорректный шаг в "{part}"')
+
+            if item == '*':
+                start, end = minimum, maximum
+            elif '-' in item:
+                start, end = (int(value) for value in item.split('-', 1))
+            else:
+                start = end = int(item)
+
+            if start < minimum or end > maximum or start > end:
+                raise CronError(f'Значение "{part}" вне диапазона {minimum}-{maximum}')
+
+            values.update(range(start, end + 1, step))
+
+        return values
+
+    def is_day_match(self, moment: datetime) -> bool:
+        is_day = moment.day in self.days
+        is_weekday = moment.weekday() in self.weekdays
+        # Как в cron: если ограничены и день месяца, и день недели, достаточно совпадения одного из них
+        if self.is_days_restricted and self.is_weekdays_restricted:
+            return is_day or is_weekday
+        return is_day and is_weekday
+
+    def get_next(self, after: datetime) -> datetime:
+        """
+            Возвращает ближайший момент запуска строго после after.
+        """
+        is_aware = timezone.is_aware(after)
+        if is_aware:
+            after = timezone.localtime(after)
+        moment = after.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + timedelta(days=self.MAX_SEARCH_DAYS)
+
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self.is_day_match(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            if moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+                continue
+
+            if is_aware:
+                return timezone.make_aware(moment)
+            return moment
+
+        raise CronError(f'Для "{self.expression}" не найдено ни одного запуска')
+
+
+def get_due_transmitters():
+    """
+        Передатчики, которым пора запускаться и которые сейчас не выполняются.
+        Блокировка старше TRANSMITTER_RUN_TIMEOUT считается зависшей.
+    """
+    from .models import Transmitter
+
+    now = timezone.now()
+    return Transmitter.objects.filter(
+        Q(next_run_at__lte=now) | Q(next_run_at__isnull=True),
+        Q(is_running=False) | Q(running_since__lt=now - timedelta(seconds=TRANSMITTER_RUN_TIMEOUT)),
+        Q(schedule_interval__gt=0) | Q(schedule_cron__gt=''),
+        is_schedule_enabled=True,
+    )
+
+
+def run_transmitter(transmitter_id: int):
+    from .models import Transmitter
+
+    try:
+        transmitter = Transmitter.objects.filter(id=transmitter_id).first()
+        if transmitter:
+            transmitter.run_scheduled()
+    finally:
+        close_old_connections()
+
+
+def run_scheduler(poll_interval: int = 10, workers: int = 4, once: bool = False, stdout=None):
+    """
+        Цикл планировщика: раз в poll_interval секунд выбирает передатчики, которым пора запускаться,
+        и выполняет их в пуле потоков. Повторный запуск еще не завершенного передатчика исключен
+        блокировкой в Transmitter.run_scheduled().
+    """
+    from .models import Transmitter
+
+    # id передатчика -> future, чтобы не ставить в очередь передатчик, который еще ждет свободного потока
+    futures = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            now = timezone.now()
+            due_transmitters = list(get_due_transmitters().only('id', 'next_run_at', 'schedule_interval', 'schedule_cron'))
+            for transmitter in due_transmitters:
+                if transmitter.next_run_at is None:
+                    # Первый запуск - по расписанию, а не сразу после включения
+                    try:
+                        next_run_at = transmitter.get_next_run_at(now)
+                    except CronError as error:
+                        transmitter.disable_schedule(str(error))
+                        continue
+
+                    Transmitter.objects.filter(id=transmitter.id).update(next_run_at=next_run_at)
+                    continue
+
+                future = futures.get(transmitter.id)
+                if future and not future.done():
+                    continue
+
+                if stdout:
+                    stdout.write(f'{now.isoformat()} запуск передатчика {transmitter.id}')
+                futures[transmitter.id] = executor.submit(run_transmitter, transmitter.id)
+
+            close_old_connections()
+            if once:
+                break
+            time.sleep(poll_interval)
@@ -0,0 +1,79 @@
+from django.db import models
+from django.db.models.query import QuerySet
+
+
+class IncludeError(ValueError):
+    """
+        Ошибка в параметре ?include=.
+    """
+
+
+class SerializationContext:
+    """
+        Состояние одной сериализации (одного ответа).
+
+        Хранит текущую глубину вложенности, уже сериализованные вложенные объекты по ключу
+        (connector, pk, глубина, набор полей) и объекты (connector, pk), которые сериализуются прямо сейчас,
+        чтобы циклические ссылки не уходили в бесконечную рекурсию.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.identity_map = {}
+        self.in_progress = set()
+        # Сколько раз цикл был заменен ссылкой: данные с такой ссылкой зависят от пути к объекту и не кэшируются
+        self.cycle_count = 0
+        self.serializer_fields = {}
+        # id SerializerField -> {pk основного объекта: id или список id связанных объектов} для ?include=
+        self.sideloaded = {}
+
+    def get_serializer_fields(self, data_connector) -> list:
+        """
+            Активные поля коннектора загружаются один раз на всю сериализацию.
+        """
+        connector_key = data_connector.pk if data_connector.pk is not None else id(data_connector)
+        if connector_key not in self.serializer_fields:
+            self.serializer_fields[connector_key] = data_connector.get_active_serializer_fields()
+        return self.serializer_fields[connector_key]
+
+    @staticmethod
+    def get_key(data_connector, obj):
+        if not isinstance(obj, models.Model) or obj.pk is None:
+            return None
+        # У временных (несохраненных) коннекторов нет pk, для них ключом служит сам объект
+        connector_key = data_connector.pk if data_connector.pk is not None else id(data_connector)
+        return (connector_key, obj.pk)
+
+    def get_identity_key(self, object_key, serializer_fields: list):
+        """
+            Ключ кэша сериализованного объекта: на другой глубине вложенные связи обрезаются иначе,
+            а с другим набором полей получаются другие данные.
+        """
+        if not object_key:
+            return None
+        fields_key = tuple(
+            serializer_field.pk if serializer_field.pk is not None else id(serializer_field)
+            for serializer_field in serializer_fields
+        )
+        return (object_key, self.depth, fields_key)
+
+    @staticmethod
+    def get_reference(obj) -> dict:
+        """
+            Ссылка на объект вместо его данных: при цикле или превышении глубины.
+        """
+        return {'id': obj.pk if isinstance(obj, models.Model) else None}
+
+
+def materialize(value):
+    """
+        Вычисляет ленивые queryset внутри сериализованных данных (например values_list у ManyToMany).
+        Нужно там, где данные кодируются вне синхронного контекста, в котором были получены.
+    """
+    if isinstance(value, QuerySet):
+        return [materialize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [materialize(item) for item in value]
+    return value
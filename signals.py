@@ -17,7 +17,10 @@ from .models import (
     DataConnector,
     SerializerField,
     FieldHandler,
+    IncomingFieldHandler,
 )
+from .definitions import clear_assembled_connectors
+from .outbox import clear_push_models, record_change, record_delete
 
 try:
     from .local_settings import MAIN_SITE_DOMAIN
@@ -60,38 +63,40 @@ def create_serializer_fields(sender: DataConnector, instance: DataConnector, cre
     В сигнале создаются поля сериализатора которые представляют из себя поля модели к которой привязан DataConnector
     '''
     if created and instance.content_type:
-        model_fields = instance.content_type.model_class()._meta.get_fields()
-        for model_field in model_fields:
-            
-            print('model_field', model_field)
-            print('model_field.name', model_field.name)
-            try:
-                verbose_name = model_field.verbose_name
-            except:
-                verbose_name = model_field.name
-
-            try:
-                field_type = model_field.get_internal_type()
-            except AttributeError:
-                if model_field.name == 'related_object':
-                    field_type = 'GenericRelation'
-            try:
-                if field_type == 'AutoField':
-                    field_type = 'default'
-                handler, created = FieldHandler.objects.get_or_create(
-                    name=field_type,
-                    slug=field_type,
-                )
-            except:
-                handler = None           
-
-            # print('dir(model_field)', dir(model_field))
-
-            serializer_field = SerializerField.objects.create(
-                data_connector=instance,
-                name=verbose_name,
-                slug=model_field.name,
-                handler=handler,
-                type=field_type,
-            )
-            
+        instance.sync_serializer_fields(remove=False)
+
+
+@receiver(post_save, sender=DataConnector)
+@receiver(post_delete, sender=DataConnector)
+@receiver(post_save, sender=SerializerField)
+@receiver(post_delete, sender=SerializerField)
+@receiver(post_save, sender=FieldHandler)
+@receiver(post_delete, sender=FieldHandler)
+@receiver(post_save, sender=IncomingFieldHandler)
+@receiver(post_delete, sender=IncomingFieldHandler)
+def reset_assembled_connectors(sender, **kwargs):
+    '''
+    Собранные из описаний коннекторы ссылаются на поля базового коннектора, обработчики и вложенные сериализаторы,
+    поэтому кэш сбрасывается при их изменении
+    '''
+    clear_assembled_connectors()
+
+
+@receiver(post_save, sender=Transmitter)
+@receiver(post_delete, sender=Transmitter)
+def reset_push_models(sender, **kwargs):
+    clear_push_models()
+
+
+@receiver(post_save)
+def record_outbox_change(sender, instance, raw: bool = False, using: str = None, **kwargs):
+    '''
+    Изменения моделей, привязанных к передатчикам с is_push, записываются в очередь OutboxEvent
+    '''
+    if not raw:
+        record_change(instance, using)
+
+
+@receiver(post_delete)
+def record_outbox_delete(sender, instance, using: str = None, **kwargs):
+    record_delete(instance, using)
@@ -1,3 +1,226 @@
-from django.test import TestCase
+import io
+import json
 
-# Create your tests here.
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.http.request import QueryDict
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .api import SuperApiView
+from .filters import FilterCompiler, FilterError
+from .management.commands import dataconnector_import
+from .management.commands.dataconnector_import import iter_json_array
+from .models import DataConnector, IncomingFieldHandler
+from .scheduler import CronSchedule, CronError
+
+
+class CronScheduleTests(SimpleTestCase):
+    """
+        Поиск следующего запуска по выражению cron.
+    """
+
+    def get_next(self, expression: str, after: datetime) -> datetime:
+        return CronSchedule(expression).get_next(after)
+
+    def test_step(self):
+        self.assertEqual(self.get_next('*/15 * * * *', datetime(2025, 1, 1, 10, 7)), datetime(2025, 1, 1, 10, 15))
+        # Строго после after, даже если after совпадает с расписанием
+        self.assertEqual(self.get_next('*/15 * * * *', datetime(2025, 1, 1, 10, 15)), datetime(2025, 1, 1, 10, 30))
+
+    def test_range_with_step(self):
+        self.assertEqual(self.get_next('0 9-17/4 * * *', datetime(2025, 1, 1, 10, 0)), datetime(2025, 1, 1, 13, 0))
+        self.assertEqual(self.get_next('0 9-17/4 * * *', datetime(2025, 1, 1, 17, 0)), datetime(2025, 1, 2, 9, 0))
+
+    def test_list(self):
+        self.assertEqual(self.get_next('5,50 * * * *', datetime(2025, 1, 1, 10, 6)), datetime(2025, 1, 1, 10, 50))
+
+    def test_weekday(self):
+        # 2025-01-01 - среда
+        self.assertEqual(self.get_next('0 0 * * 1', datetime(2025, 1, 1)), datetime(2025, 1, 6))
+        # Воскресенье - и 0, и 7
+        self.assertEqual(self.get_next('0 0 * * 0', datetime(2025, 1, 1)), datetime(2025, 1, 5))
+        self.assertEqual(self.get_next('0 0 * * 7', datetime(2025, 1, 1)), datetime(2025, 1, 5))
+
+    def test_day_of_month(self):
+        self.assertEqual(self.get_next('30 6 31 * *', datetime(2025, 2, 1)), datetime(2025, 3, 31, 6, 30))
+
+    def test_day_of_month_or_weekday(self):
+        # Ограничены оба поля: достаточно совпадения дня месяца или дня недели (пятница 3 января)
+        self.assertEqual(self.get_next('0 0 13 * 5', datetime(2025, 1, 1)), datetime(2025, 1, 3))
+
+    def test_invalid_expression(self):
+        for expression in ('* * * *', '60 * * * *', '*/0 * * * *', '5-1 * * * *', 'a * * * *'):
+            with self.subTest(expression=expression), self.assertRaises(CronError):
+                CronSchedule(expression)
+
+    def test_impossible_date(self):
+        with self.assertRaises(CronError):
+            self.get_next('0 0 31 2 *', datetime(2025, 1, 1))
+
+
+class FilterCompilerTests(TestCase):
+    """
+        Преобразование GET параметров в фильтр по полям сериализатора.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        IncomingFieldHandler.objects.create(name='A', slug='a', method='x')
+        IncomingFieldHandler.objects.create(name='B', slug='b', method='y')
+        IncomingFieldHandler.objects.create(name='C', slug='c', method='x')
+
+    def setUp(self):
+        self.compiler = FilterCompiler(IncomingFieldHandler, [
+            SimpleNamespace(slug='id', alt_key=None, type='BigAutoField'),
+            SimpleNamespace(slug='slug', alt_key='code', type='SlugField'),
+            SimpleNamespace(slug='method', alt_key=None, type='CharField'),
+        ])
+
+    def filter_slugs(self, query: str) -> list:
+        django_filter = self.compiler.compile(QueryDict(query))
+        return sorted(IncomingFieldHandler.objects.filter(django_filter).values_list('slug', flat=True))
+
+    def test_exact_and_alt_key(self):
+        self.assertEqual(self.filter_slugs('slug=a'), ['a'])
+        self.assertEqual(self.filter_slugs('code=b'), ['b'])
+        self.assertEqual(self.filter_slugs('method=x&slug=c'), ['c'])
+
+    def test_negation(self):
+        self.assertEqual(self.filter_slugs('slug__not=a'), ['b', 'c'])
+        self.assertEqual(self.filter_slugs('slug__in__not=a,b'), ['c'])
+
+    def test_in(self):
+        self.assertEqual(self.filter_slugs('slug__in=a,c,'), ['a', 'c'])
+
+    def test_or_group(self):
+        self.assertEqual(self.filter_slugs('or=slug=a|method=y'), ['a', 'b'])
+        # Группа ИЛИ объединяется с остальными условиями через И
+        self.assertEqual(self.filter_slugs('method=x&or=slug=a|slug=b'), ['a'])
+
+    def test_bad_keys(self):
+        for query in (
+            'name=A',               # поле не разрешено сериализатором
+            'slug__regex=a',        # недопустимый лукап
+            'slug__in__gte=a',
+            'or=slug',              # условие без значения
+            'id=abc',               # значение не приводится к типу поля
+        ):
+            with self.subTest(query=query), self.assertRaises(FilterError):
+                self.compiler.compile(QueryDict(query))
+
+
+class IterJsonArrayTests(SimpleTestCase):
+    """
+        Потоковое чтение JSON массива при загрузке выгрузки.
+    """
+
+    def read(self, text: str, block_size: int) -> list:
+        with mock.patch.object(dataconnector_import, 'READ_BLOCK_SIZE', block_size):
+            return list(iter_json_array(io.StringIO(text)))
+
+    def test_chunk_boundaries(self):
+        items = [
+            {'id': index, 'title': '[x], {y} "q" \\ ]' * (index % 3), 'values': [1.5e10, True, None, {'key': ']'}]}
+            for index in range(50)
+        ]
+        text = json.dumps(items, indent=1)
+        for block_size in (1, 2, 3, 7, 64, len(text)):
+            with self.subTest(block_size=block_size):
+                self.assertEqual(self.read(text, block_size), items)
+
+    def test_empty(self):
+        self.assertEqual(self.read(' [ ] ', 2), [])
+        self.assertEqual(self.read('', 2), [])
+
+    def test_not_array(self):
+        with self.assertRaises(ValueError):
+            self.read('{"id": 1}', 4)
+
+    def test_malformed_item_fails_fast(self):
+        text = '[{"id": 1}, {"id": nope}, ' + ', '.join(['{"id": 2}'] * 1000) + ']'
+        file = io.StringIO(text)
+        with mock.patch.object(dataconnector_import, 'READ_BLOCK_SIZE', 16), \
+                mock.patch.object(file, 'read', wraps=file.read) as read, \
+                self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(file))
+        self.assertLess(read.call_count, 20)
+
+
+class BulkWriteTests(TestCase):
+    """
+        Массовые записи коннектора: ошибки по индексу и разрешения.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user('tester')
+        cls.data_connector = DataConnector.objects.create(
+            name='incoming handlers',
+            content_type=ContentType.objects.get_for_model(IncomingFieldHandler),
+            is_allow_view=True,
+            is_allow_create=True,
+            is_allow_edit=True,
+            upsert_key='slug',
+        )
+        cls.handler = IncomingFieldHandler.objects.create(name='A', slug='a')
+
+    def request(self, method: str, data, obj_id=None):
+        request = getattr(APIRequestFactory(), method.lower())('/', data, format='json')
+        force_authenticate(request, user=self.user)
+        return SuperApiView.as_view()(request, natural_key='data_connector__incomingfieldhandler', obj_id=obj_id)
+
+    def test_bulk_update_errors_by_index(self):
+        comment, response_status, response_data, error_data = self.data_connector.bulk_update_data([
+            {'id': self.handler.id, 'name': 'A2'},
+            {'name': 'no id'},
+            {'id': [self.handler.id], 'name': 'list id'},
+            {'id': True, 'name': 'bool id'},
+            {'id': 'abc', 'name': 'bad id'},
+            {'id': 0, 'name': 'missing'},
+            {'id': str(self.handler.id), 'unknown': 1},
+        ])
+        self.assertEqual(response_status, 200)
+        self.assertEqual(sorted(error_data), [1, 2, 3, 4, 5, 6])
+        self.assertIn('id', error_data[4])
+        self.assertIn('unknown', error_data[6])
+        self.handler.refresh_from_db()
+        self.assertEqual(self.handler.name, 'A2')
+
+    def test_bulk_update_all_failed(self):
+        *_, response_status, response_data, error_data = self.data_connector.bulk_update_data([{'id': 0, 'name': 'x'}])
+        self.assertEqual(response_status, 400)
+        self.assertEqual(list(error_data), [0])
+
+    def test_upsert_errors_by_index(self):
+        index_keys, error_data = self.data_connector.upsert_objects([
+            {'slug': 'a', 'name': 'A2'},
+            'not an object',
+            {'name': 'no key'},
+            {'slug': 'b', 'name': 'B'},
+        ])
+        self.assertEqual(sorted(index_keys), [0, 3])
+        self.assertEqual(sorted(error_data), [1, 2])
+        self.assertIn('upsert_key', error_data[2])
+        self.assertEqual(
+            dict(IncomingFieldHandler.objects.values_list('slug', 'name')),
+            {'a': 'A2', 'b': 'B'},
+        )
+
+    def test_upsert_without_edit_is_forbidden(self):
+        DataConnector.objects.filter(pk=self.data_connector.pk).update(is_allow_edit=False)
+        response = self.request('POST', {'slug': 'a', 'name': 'overwritten'})
+        self.assertEqual(response.status_code, 403)
+        self.handler.refresh_from_db()
+        self.assertEqual(self.handler.name, 'A')
+
+    def test_bulk_update_without_edit_is_forbidden(self):
+        DataConnector.objects.filter(pk=self.data_connector.pk).update(is_allow_edit=False)
+        response = self.request('PATCH', [{'id': self.handler.id, 'name': 'overwritten'}])
+        self.assertEqual(response.status_code, 403)
+        self.handler.refresh_from_db()
+        self.assertEqual(self.handler.name, 'A')
@@ -0,0 +1,113 @@
+import time
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+
+from .module_settings import (
+    REMOTE_SITE_LIMIT_TIMEOUT,
+    REMOTE_SITE_LIMIT_POLL_INTERVAL,
+)
+
+
+class RemoteSiteLimitTimeout(Exception):
+    """
+        Не удалось дождаться разрешения на запрос к удаленному сайту.
+    """
+
+
+class RemoteSiteLimiter:
+    """
+        Ограничивает исходящие запросы к RemoteSite: число одновременных запросов
+        и token bucket по количеству запросов и байтов в секунду.
+
+        Состояние хранится в RemoteSiteThrottle и меняется под select_for_update,
+        поэтому лимиты общие для всех процессов и воркеров.
+
+        with RemoteSiteLimiter(remote_site, len(body)):
+            requests.post(...)
+    """
+
+    def __init__(self, remote_site, body_size: int = 0, timeout: float = REMOTE_SITE_LIMIT_TIMEOUT):
+        self.remote_site = remote_site
+        self.body_size = body_size
+        self.timeout = timeout
+        self.is_acquired = False
+        self.lease_id = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def acquire(self):
+        if not self.remote_site.has_limits():
+            return
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                self.is_acquired = True
+                return
+
+            if time.monotonic() + wait > deadline:
+                raise RemoteSiteLimitTimeout(
+                    f'Превышено время ожидания лимитов сайта {self.remote_site.domain}'
+                )
+            time.sleep(wait)
+
+    def try_acquire(self) -> float:
+        """
+            Пытается занять слот и токены. Возвращает 0 при успехе, иначе сколько секунд подождать.
+        """
+        from .models import RemoteSiteThrottle
+
+        remote_site = self.remote_site
+        with transaction.atomic():
+            throttle, created = RemoteSiteThrottle.objects.select_for_update().get_or_create(
+                remote_site=remote_site,
+            )
+            now = timezone.now()
+
+            throttle.expire_leases(now)
+            throttle.refill(remote_site, now, self.body_size)
+
+            waits = []
+            if remote_site.max_concurrent_requests and throttle.active_requests >= remote_site.max_concurrent_requests:
+                waits.append(REMOTE_SITE_LIMIT_POLL_INTERVAL)
+            if remote_site.rate_limit_requests and throttle.request_tokens < 1:
+                waits.append((1 - throttle.request_tokens) / remote_site.rate_limit_requests)
+            if remote_site.rate_limit_bytes and throttle.byte_tokens < self.body_size:
+                waits.append((self.body_size - throttle.byte_tokens) / remote_site.rate_limit_bytes)
+
+            if not waits:
+                self.lease_id = uuid.uuid4().hex
+                throttle.active_leases[self.lease_id] = now.timestamp()
+                throttle.active_requests = len(throttle.active_leases)
+                if remote_site.rate_limit_requests:
+                    throttle.request_tokens -= 1
+                if remote_site.rate_limit_bytes:
+                    throttle.byte_tokens -= self.body_size
+
+            throttle.save()
+
+        return max(waits) if waits else 0
+
+    def release(self):
+        if not self.is_acquired:
+            return
+
+        from .models import RemoteSiteThrottle
+
+        with transaction.atomic():
+            throttle = RemoteSiteThrottle.objects.select_for_update().filter(remote_site=self.remote_site).first()
+            # Слот мог уже истечь и достаться другому запросу
+            if throttle and throttle.active_leases.pop(self.lease_id, None) is not None:
+                throttle.active_requests = len(throttle.active_leases)
+                throttle.save(update_fields=['active_leases', 'active_requests'])
+
+        self.is_acquired = False
+        self.lease_id = None
@@ -1,4 +1,5 @@
 from django.urls import include, path
+from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework import routers
 
@@ -18,6 +19,14 @@ urlpatterns = [
     #     'super-api/<str:model_id>/',
     #     api.sa
     # ),
+    path(
+        'super-api/batch/',
+        api.SuperApiBatchView.as_view(),
+    ),
+    path(
+        'super-api/definitions/',
+        api.ConnectorDefinitionsView.as_view(),
+    ),
     path(
         'super-api/<str:natural_key>/',
         api.SuperApiView.as_view(),
@@ -34,4 +43,21 @@ urlpatterns = [
         'super-api/<str:natural_key>/<str:serializer_name>/<int:obj_id>/',
         api.SuperApiView.as_view(),
     ),
+
+    path(
+        'async-super-api/<str:natural_key>/',
+        csrf_exempt(api.AsyncSuperApiView.as_view()),
+    ),
+    path(
+        'async-super-api/<str:natural_key>/<int:obj_id>/',
+        csrf_exempt(api.AsyncSuperApiView.as_view()),
+    ),
+    path(
+        'async-super-api/<str:natural_key>/<str:serializer_name>/',
+        csrf_exempt(api.AsyncSuperApiView.as_view()),
+    ),
+    path(
+        'async-super-api/<str:natural_key>/<str:serializer_name>/<int:obj_id>/',
+        csrf_exempt(api.AsyncSuperApiView.as_view()),
+    ),
 ]
\ No newline at end of file